@@ -0,0 +1,101 @@
+"""Generate a synthetic JSON file for benchmarks.
+
+   >>>python -m benchmarks.generate records.json --records 2000 --depth 2
+"""
+import argparse
+import json
+import random
+from collections import namedtuple
+
+
+Dataset = namedtuple('Dataset', 'records width depth list_length number_ratio url_ratio seed')
+Dataset.__new__.__defaults__ = (2000, 10, 2, 3, 0.5, 0.05, 0)
+
+
+def make_template(dataset, rng, depth, items=True):
+    """Return dict {key: kind or nested template}. Each key has the same kind
+       in all of the records, like real data.
+       Objects have width scalar fields, and objects shallower than depth
+       have 'child' object, 'items' list of objects and 'tags' list.
+       Objects in 'child' have no 'items', because FromExcel cannot restore
+       lists of objects under objects which are not in lists.
+    """
+    template = {}
+    for i in range(dataset.width):
+        if rng.random() < dataset.number_ratio:
+            kind = rng.choice(('int', 'float'))
+        else:
+            kind = 'url' if rng.random() < dataset.url_ratio else 'str'
+        template[f'{kind}_{i}'] = kind
+    if depth < dataset.depth:
+        template['child'] = make_template(dataset, rng, depth + 1, False)
+        if items:
+            template['items'] = [make_template(dataset, rng, depth + 1)]
+        template['tags'] = 'tags'
+    return template
+
+
+def fill(template, dataset, rng, serial):
+    if isinstance(template, dict):
+        return {key: fill(val, dataset, rng, serial) for key, val in template.items()}
+    if isinstance(template, list):
+        return [fill(template[0], dataset, rng, serial) for _ in range(dataset.list_length)]
+    if template == 'int':
+        return rng.randrange(1, 10 ** 6)
+    if template == 'float':
+        return rng.randrange(1, 10 ** 6) / 100
+    if template == 'url':
+        return f'https://example.com/{serial}/{rng.randrange(10 ** 6)}'
+    if template == 'tags':
+        return [f'tag-{rng.randrange(100)}' for _ in range(dataset.list_length)]
+    return f'値-{rng.randrange(10 ** 6)}'
+
+
+def generate(dataset):
+    """Yield records of dataset. The same dataset always has the same records.
+    """
+    rng = random.Random(dataset.seed)
+    template = make_template(dataset, rng, 0)
+    for i in range(dataset.records):
+        yield fill(template, dataset, rng, i)
+
+
+def write(path, dataset):
+    """Write records to JSON file, or JSON Lines file if path ends with .jsonl.
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            for record in generate(dataset):
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        else:
+            json.dump(list(generate(dataset)), f, ensure_ascii=False)
+
+
+def add_arguments(parser):
+    parser.add_argument('--records', type=int, default=Dataset().records)
+    parser.add_argument('--width', type=int, default=Dataset().width,
+        help='number of scalar fields of each object')
+    parser.add_argument('--depth', type=int, default=Dataset().depth,
+        help='nesting depth of objects and lists')
+    parser.add_argument('--list-length', type=int, default=Dataset().list_length)
+    parser.add_argument('--number-ratio', type=float, default=Dataset().number_ratio,
+        help='ratio of numbers to scalar fields')
+    parser.add_argument('--url-ratio', type=float, default=Dataset().url_ratio,
+        help='ratio of URLs to string fields')
+    parser.add_argument('--seed', type=int, default=Dataset().seed)
+
+
+def get_dataset(args):
+    return Dataset(*(getattr(args, field) for field in Dataset._fields))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', help='.json or .jsonl file')
+    add_arguments(parser)
+    args = parser.parse_args()
+    write(args.path, get_dataset(args))
+
+
+if __name__ == '__main__':
+    main()
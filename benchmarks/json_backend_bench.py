@@ -0,0 +1,51 @@
+"""Compare JSON backends of JsonFile.
+
+   >>>python -m benchmarks.json_backend_bench [number of records]
+"""
+import os
+import sys
+import time
+from tempfile import TemporaryDirectory
+
+from jsonexcel import JsonFile, JSON_BACKENDS
+from jsonexcel.convert import orjson
+
+
+def make_records(n):
+    return [{
+        'id': i,
+        'name': f'name-{i}',
+        'price': i * 1.25,
+        'tags': ['あ', 'b', 'c'],
+        'detail': {'url': f'https://example.com/{i}', 'stock': [{'store': j, 'count': j * i} for j in range(3)]},
+    } for i in range(n)]
+
+
+def measure(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main(n):
+    records = make_records(n)
+    names = [name for name in JSON_BACKENDS if name == 'json' or orjson]
+    with TemporaryDirectory() as dir_path:
+        print(f'{n} records')
+        print(f'{"backend":<10}{"phase":<22}{"seconds":>10}')
+        for name in names:
+            for indent in (None, 2):
+                json_file = JsonFile(os.path.join(dir_path, f'{name}.json'), backend=name)
+                seconds = measure(lambda: json_file.output(iter(records), indent))
+                print(f'{name:<10}{f"write indent={indent}":<22}{seconds:>10.3f}')
+            for streaming in (True, False):
+                json_file = JsonFile(json_file.file, streaming=streaming, backend=name)
+                phase = 'read json' if streaming else 'read json in memory'
+                print(f'{name:<10}{phase:<22}{measure(lambda: list(json_file)):>10.3f}')
+            json_file = JsonFile(os.path.join(dir_path, f'{name}.jsonl'), backend=name)
+            print(f'{name:<10}{"write jsonl":<22}{measure(lambda: json_file.output(iter(records), None)):>10.3f}')
+            print(f'{name:<10}{"read jsonl":<22}{measure(lambda: list(json_file)):>10.3f}')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,188 @@
+"""Measure seconds and peak memory of each phase of conversions
+   with a synthetic dataset, and compare them with a baseline.
+
+   >>>python -m benchmarks.suite --records 2000 --output results.json
+   >>>python -m benchmarks.suite --records 2000 --baseline results.json
+
+   Seconds are the best of --repeat runs. Peak memory is measured with
+   tracemalloc in another run, because tracing slows the conversion
+   several times. Specify --no-memory to skip it.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import sys
+import time
+import tracemalloc
+import warnings
+from datetime import datetime
+from tempfile import TemporaryDirectory
+
+from jsonexcel import ToExcel, FastToExcel, FromExcel
+from benchmarks.generate import add_arguments, get_dataset, write
+
+
+def run_to_excel(path, to_excel_class=ToExcel, partial=False):
+    """Yield the name of each phase before running it.
+    """
+    to_excel = to_excel_class(path, schema_cache=False)
+    yield 'schema'
+    to_excel.set_sheet_format()
+    if partial:
+        # Every other column, which leaves out some of the sheets.
+        keys = sorted(to_excel.sheet_format)[::2]
+        yield 'write'
+        to_excel.partial_convert(*keys)
+    else:
+        yield 'write'
+        to_excel.convert()
+
+
+def run_from_excel(path):
+    yield 'open'
+    from_excel = FromExcel(path)
+    yield 'convert'
+    from_excel.convert()
+    from_excel.close()
+
+
+def get_cases(json_path, excel_path):
+    """Return dict {case name: function returning phase iterator}.
+       from_excel reads the Excel file written beforehand.
+    """
+    return {
+        'to_excel': lambda: run_to_excel(json_path),
+        'partial_convert': lambda: run_to_excel(json_path, partial=True),
+        'fast_to_excel': lambda: run_to_excel(json_path, FastToExcel),
+        'from_excel': lambda: run_from_excel(excel_path),
+    }
+
+
+def measure_seconds(phases):
+    """Return dict {phase: seconds}.
+    """
+    result = {}
+    phase = next(phases)
+    while phase is not None:
+        start = time.perf_counter()
+        next_phase = next(phases, None)
+        result[phase] = time.perf_counter() - start
+        phase = next_phase
+    return result
+
+
+def measure_memory(phases):
+    """Return dict {phase: peak bytes allocated in the phase}.
+    """
+    result = {}
+    phase = next(phases)
+    while phase is not None:
+        tracemalloc.start()
+        try:
+            next_phase = next(phases, None)
+            result[phase] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        phase = next_phase
+    return result
+
+
+def run(dataset, cases=None, repeat=3, memory=True):
+    """Return dict {'case.phase': {'seconds': float, 'peak_mb': float}}.
+       peak_mb is None if memory is False.
+    """
+    results = {}
+    with TemporaryDirectory() as dir_path:
+        json_path = os.path.join(dir_path, 'records.json')
+        write(json_path, dataset)
+        excel_dir = os.path.join(dir_path, 'excel')
+        os.mkdir(excel_dir)
+        source = shutil.copy(json_path, excel_dir)
+        ToExcel(source, schema_cache=False).convert()
+        excel_path, = glob.glob(os.path.join(excel_dir, '*.xlsx'))
+
+        all_cases = get_cases(json_path, excel_path)
+        for name in cases or all_cases:
+            runs = [measure_seconds(all_cases[name]()) for _ in range(repeat)]
+            peaks = measure_memory(all_cases[name]()) if memory else {}
+            for phase in runs[0]:
+                results[f'{name}.{phase}'] = {
+                    'seconds': round(min(r[phase] for r in runs), 4),
+                    'peak_mb': round(peaks[phase] / 1024 ** 2, 2) if memory else None,
+                }
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return a list of messages of the phases which are slower or
+       use more memory than the baseline by more than threshold.
+    """
+    regressions = []
+    for name, result in results.items():
+        if (base := baseline.get(name)) is None:
+            continue
+        for metric in ('seconds', 'peak_mb'):
+            if base[metric] and result[metric] is not None \
+                    and result[metric] > base[metric] * (1 + threshold):
+                regressions.append(f'{name} {metric}: {base[metric]} -> {result[metric]} '
+                    f'(+{result[metric] / base[metric] - 1:.0%})')
+    return regressions
+
+
+def print_results(results, baseline):
+    print(f'{"phase":<28}{"seconds":>10}{"peak MB":>10}{"base s":>10}{"base MB":>10}')
+    for name, result in results.items():
+        base = baseline.get(name, {})
+        peak = '' if result['peak_mb'] is None else f'{result["peak_mb"]:.2f}'
+        print(f'{name:<28}{result["seconds"]:>10.3f}{peak:>10}'
+            f'{base.get("seconds") or "":>10}{base.get("peak_mb") or "":>10}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument('--cases', nargs='+', choices=tuple(get_cases(None, None)), default=None)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true', help='do not measure peak memory')
+    parser.add_argument('--output', help='JSON file to save results')
+    parser.add_argument('--baseline', help='JSON file of results to compare with')
+    parser.add_argument('--threshold', type=float, default=0.1,
+        help='ratio of increase reported as regression (default: 0.1)')
+    args = parser.parse_args()
+
+    dataset = get_dataset(args)
+    # Excel allows 65530 URLs per sheet and warns about the rest.
+    warnings.simplefilter('ignore')
+    results = run(dataset, args.cases, args.repeat, not args.no_memory)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        if saved['dataset'] != dataset._asdict():
+            print('warning: the dataset of the baseline is different.', file=sys.stderr)
+        baseline = saved['results']
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'date': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'dataset': dataset._asdict(),
+                'results': results,
+            }, f, indent=2)
+
+    if regressions := compare(results, baseline, args.threshold):
+        print('\nregressions:')
+        for message in regressions:
+            print(f'  {message}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,15 @@
 from collections import namedtuple
+from functools import partial
 import errno
 import os
+import threading
 import tkinter as tk
 import tkinter.ttk as ttk
 import tkinter.messagebox as messagebox
 import tkinter.filedialog as dialog
 
-from jsonexcel import ToExcel, FromExcel, file_check, ExtensionError
+from jsonexcel import ToExcel, FromExcel, JsonFile, file_check, ExtensionError, \
+    Progress, Cancelled
 
 
 TOEXCEL = 'ToExcel'
@@ -17,6 +20,8 @@ Key = namedtuple('Key', 'nested real')
 
 
 class ConverterWindow(ttk.Frame):
+
+    POLL_INTERVAL = 100
     
     def __init__(self, master):
         super().__init__(master)
@@ -28,7 +33,12 @@ class ConverterWindow(ttk.Frame):
         self.json_path = tk.StringVar()
         self.excel_path = tk.StringVar()
         self.edit_key = tk.StringVar()
+        self.status = tk.StringVar()
         self.now_selected = None
+        self.open_buttons = []
+        self.progress = None
+        self.worker = None
+        self.converter = None
        
        
     def create_ui(self):
@@ -46,8 +56,17 @@ class ConverterWindow(ttk.Frame):
         self.tab_fromexcel = ttk.Frame(self.note)
         self.note.add(self.tab_toexcel, text=TOEXCEL)
         self.note.add(self.tab_fromexcel, text=FROMEXCEL)
-        close_button = ttk.Button(frame, text='Close', command=self.close)
-        close_button.pack(side=tk.RIGHT, pady=10, padx=20)
+        bottom_frame = ttk.Frame(frame)
+        bottom_frame.pack(fill=tk.X, pady=10, padx=20)
+        self.progress_bar = ttk.Progressbar(bottom_frame, maximum=100)
+        self.progress_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        status_label = ttk.Label(bottom_frame, textvariable=self.status, width=30)
+        status_label.pack(side=tk.LEFT, padx=10)
+        self.cancel_button = ttk.Button(bottom_frame, text='Cancel', 
+            command=self.cancel, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT)
+        close_button = ttk.Button(bottom_frame, text='Close', command=self.close)
+        close_button.pack(side=tk.LEFT, padx=(10, 0))
 
 
     def create_tab_top_frame(self, main_frame, textvariable):
@@ -60,6 +79,7 @@ class ConverterWindow(ttk.Frame):
         path_entry.grid(row=0, column=1, sticky=(tk.W, tk.E))
         open_button = ttk.Button(top_frame, text='Open', command=self.open)
         open_button.grid(row=0, column=2, sticky=tk.E)
+        self.open_buttons.append(open_button)
         top_frame.columnconfigure(1, weight=1)
         return top_frame
 
@@ -163,9 +183,23 @@ class ConverterWindow(ttk.Frame):
             
 
     def close(self, event=None):
+        """Wait for the cancelled conversion to remove its output.
+        """
+        if self.worker is not None and self.worker.is_alive():
+            self.progress.cancel()
+            self.worker.join()
+        self.release_converter()
         self.quit()
 
 
+    def cancel(self, event=None):
+        """Called when cancel button is clicked.
+        """
+        if self.progress is not None:
+            self.progress.cancel()
+            self.status.set('Cancelling...')
+
+
     def keys_box_click(self, event=None):
         """Called when item is selected in keys_box(ListBox)
            on FromExcel tab.
@@ -195,10 +229,11 @@ class ConverterWindow(ttk.Frame):
 
     def select_file(self, ext, string_var):
         """Called by open_json or open_excel method 
-           when open button is clicked.
+           when open button is clicked. ext: str or tuple of str
         """
         initialdir = os.path.abspath(os.path.dirname(__file__))
-        filetypes = [('Data file', f'*.{ext}')]
+        exts = (ext,) if isinstance(ext, str) else ext
+        filetypes = [('Data file', ' '.join(f'*.{ext}' for ext in exts))]
         target_file = dialog.askopenfilename(
                 filetypes=filetypes, initialdir=initialdir)
         string_var.set(target_file)
@@ -218,6 +253,14 @@ class ConverterWindow(ttk.Frame):
                     messagebox.showerror('Error', 'Please close the excel file.')
                     string_var.set('')
         return converter  
+
+
+    def release_converter(self):
+        """Close the Excel file which FromExcel keeps open in read-only mode.
+           It is opened again if the converter is used after this.
+        """
+        if isinstance(self.converter, FromExcel):
+            self.converter.close()
        
 
     def get_current_tab_name(self):
@@ -238,14 +281,90 @@ class ConverterWindow(ttk.Frame):
             self.fromexcel_deselect_button['state'] = state
 
 
+    def run_in_background(self, func, on_success, restore=True):
+        """Run func of the converter in a worker thread not to freeze
+           the window, and show its progress until it is finished.
+           on_success is called if func is not failed or cancelled. 
+           Cancel button has no effect if func finishes without reading
+           records after it is clicked.
+           restore: If True, convert buttons are enabled again at the end.
+        """
+        self.progress = self.converter.progress = Progress()
+        self.task_error = None
+        self.set_running(True)
+        self.worker = threading.Thread(target=self.run_task, args=(func,), daemon=True)
+        self.worker.start()
+        self.after(self.POLL_INTERVAL, self.poll_task, on_success, restore)
+
+
+    def run_task(self, func):
+        """Called in the worker thread. Widgets must not be used here.
+        """
+        try:
+            func()
+        except Exception as e:
+            self.task_error = e
+
+
+    def poll_task(self, on_success, restore):
+        if self.worker.is_alive():
+            self.show_progress()
+            self.after(self.POLL_INTERVAL, self.poll_task, on_success, restore)
+            return
+        self.set_running(False)
+        if restore:
+            self.switch_button_state(tk.NORMAL)
+        if self.task_error is not None:
+            self.release_converter()
+        if isinstance(self.task_error, Cancelled):
+            self.status.set('Cancelled.')
+        elif self.task_error is not None:
+            self.status.set('')
+            messagebox.showerror('Error', self.task_error)
+        else:
+            self.status.set('')
+            on_success()
+
+
+    def show_progress(self):
+        """Progress bar moves back and forth if the total is unknown.
+        """
+        if (fraction := self.progress.fraction) is None:
+            self.progress_bar.configure(mode='indeterminate')
+            self.progress_bar.step(5)
+        else:
+            self.progress_bar.configure(mode='determinate', value=fraction * 100)
+        if not self.progress.cancelled:
+            phase = {'schema': 'Finding keys', 'types': 'Finding data types', 
+                'convert': 'Converting'}.get(self.progress.phase)
+            unit = 'rows' if self.progress.phase == 'types' else 'records'
+            self.status.set(f'{phase}: {self.progress.records} {unit}' if phase else 'Reading...')
+
+
+    def set_running(self, running):
+        """Disable the other tab and buttons while a conversion is running.
+        """
+        state = tk.DISABLED if running else tk.NORMAL
+        self.cancel_button['state'] = tk.NORMAL if running else tk.DISABLED
+        for button in self.open_buttons:
+            button['state'] = state
+        for tab in self.note.tabs():
+            if tab != self.note.select():
+                self.note.tab(tab, state=state)
+        if running:
+            self.switch_button_state(tk.DISABLED)
+        else:
+            self.progress_bar.configure(mode='determinate', value=0)
+
+
     def to_excel(self):
         """Called when convert button on toexcel tab is clicked.
         """
         if selected_keys := [self.key_box.get(x) for x in self.key_box.curselection()]:
-            self.converter.partial_convert(*selected_keys)
+            func = partial(self.converter.partial_convert, *selected_keys)
         else:
-            self.converter.convert()
-        messagebox.showinfo('Info', 'Complete!')
+            func = self.converter.convert
+        self.run_in_background(func, self.show_complete)
         
 
     def from_excel(self):
@@ -253,7 +372,12 @@ class ConverterWindow(ttk.Frame):
         """
         replacement = {key.nested: key.real for key in self.edited_keys.values()} \
             if self.edited_keys else None
-        self.converter.convert(replacement=replacement)
+        # convert closes the Excel file when it is finished.
+        self.run_in_background(
+            partial(self.converter.convert, replacement=replacement), self.show_complete)
+
+
+    def show_complete(self):
         messagebox.showinfo('Info', 'Complete!')
 
 
@@ -261,17 +385,21 @@ class ConverterWindow(ttk.Frame):
         """Called when open button on toexcel tab is clicked.
         """
         self.switch_button_state(tk.DISABLED)
-        self.select_file('json', self.json_path)
+        self.select_file(JsonFile.EXTENSIONS, self.json_path)
         self.key_box.delete(0, tk.END)
+        self.release_converter()
         if converter := self.set_converter(self.json_path, ToExcel):
             self.converter = converter
-            self.converter.set_sheet_format()
-            exclude_keys = set(f'{sh_name}-0' for sh_name \
-                in self.converter.sheet_format.values())
-            display_keys = sorted(key for key in self.converter.sheet_format.keys() \
-                if key not in exclude_keys)
-            self.key_box.insert(tk.END, *display_keys)
-            self.switch_button_state(tk.NORMAL)
+            self.run_in_background(converter.set_sheet_format, self.show_json_keys, restore=False)
+
+
+    def show_json_keys(self):
+        exclude_keys = set(f'{sh_name}-0' for sh_name \
+            in self.converter.sheet_format.values())
+        display_keys = sorted(key for key in self.converter.sheet_format.keys() \
+            if key not in exclude_keys)
+        self.key_box.insert(tk.END, *display_keys)
+        self.switch_button_state(tk.NORMAL)
 
 
     def open_excel(self):
@@ -282,19 +410,24 @@ class ConverterWindow(ttk.Frame):
         self.edited_box.delete(0, tk.END)
         self.edit_entry.delete(0, tk.END)
         self.edited_keys = {}
+        self.release_converter()
         if converter := self.set_converter(self.excel_path, FromExcel):
             self.converter = converter
-            converter.set_sheets()
-            key_table = set()
-            for sh in converter.sheets:
-                key_table.update({Key(nested_key, real_key) for sh_keys 
-                    in sh.keys for nested_key, real_key in converter.separate(sh_keys)})
-            len_table = len(key_table)
-            zeros = len(str(len_table))
-            self.key_table = {str(i).zfill(zeros): key for i, key in enumerate(sorted(key_table), 1)}
-            display_keys = [f'{idx}  {key.nested}' for idx, key in self.key_table.items()]
-            self.keys_box.insert(tk.END, *display_keys)
-            self.switch_button_state(tk.NORMAL)
+            # Data types are found by reading all rows.
+            self.run_in_background(converter.set_sheets, self.show_excel_keys, restore=False)
+
+
+    def show_excel_keys(self):
+        key_table = set()
+        for sh in self.converter.sheets:
+            key_table.update({Key(nested_key, real_key) for sh_keys 
+                in sh.keys for nested_key, real_key in self.converter.separate(sh_keys)})
+        len_table = len(key_table)
+        zeros = len(str(len_table))
+        self.key_table = {str(i).zfill(zeros): key for i, key in enumerate(sorted(key_table), 1)}
+        display_keys = [f'{idx}  {key.nested}' for idx, key in self.key_table.items()]
+        self.keys_box.insert(tk.END, *display_keys)
+        self.switch_button_state(tk.NORMAL)
 
 
     def edited_box_deselect(self):
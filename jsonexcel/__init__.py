@@ -1,2 +1,6 @@
+from jsonexcel.metrics import *
+from jsonexcel.progress import *
+from jsonexcel.schema_cache import *
 from jsonexcel.convert import *
-from jsonexcel.fast_convert import *
\ No newline at end of file
+from jsonexcel.fast_convert import *
+from jsonexcel.csv_convert import *
@@ -0,0 +1,150 @@
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import glob
+import os
+import re
+import time
+
+from jsonexcel.convert import ToExcel, FromExcel, JsonFile, ENGINES
+
+
+TO_EXCEL = 'to_excel'
+FROM_EXCEL = 'from_excel'
+
+# Outputs are named like records_20201203123456.xlsx.
+TIMESTAMP = re.compile(r'_\d{14}$')
+
+
+Task = namedtuple('Task', 'source direction')
+
+
+class Result(namedtuple('Result', 'source direction output status seconds size error')):
+    """status: 'converted', 'skipped' or 'failed'
+       size: bytes of the source file.
+    """
+
+    @property
+    def throughput(self):
+        """Return bytes per second, or None if not converted.
+        """
+        if self.status == 'converted' and self.seconds:
+            return self.size / self.seconds
+        return None
+
+
+def get_direction(path):
+    ext = os.path.splitext(path)[-1][1:]
+    if ext in JsonFile.EXTENSIONS:
+        return TO_EXCEL
+    if ext == 'xlsx':
+        return FROM_EXCEL
+    return None
+
+
+def find_sources(patterns):
+    """Return sorted paths of JSON and Excel files found with glob patterns.
+       If a pattern is a directory, files directly under it are found.
+    """
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, '*')
+        for path in glob.glob(pattern):
+            if os.path.isfile(path) and get_direction(path):
+                paths.add(os.path.abspath(path))
+    return sorted(paths)
+
+
+def get_tasks(paths, direction=None):
+    """Return a list of Task. If direction is None, it is decided by
+       the extension, and files which are outputs of other files in paths,
+       like records_20201203123456.xlsx of records.json, are left out.
+    """
+    if direction is not None:
+        return [Task(path, direction) for path in paths if get_direction(path) == direction]
+    bases = {os.path.splitext(path)[0] for path in paths}
+    return [Task(path, get_direction(path)) for path in paths if not is_output(path, bases)]
+
+
+def is_output(path, bases):
+    base = os.path.splitext(path)[0]
+    return TIMESTAMP.search(base) is not None and TIMESTAMP.sub('', base) in bases
+
+
+def output_ext(direction, to_excel, from_excel):
+    if direction == TO_EXCEL:
+        engine = to_excel.get('engine', 'xlsxwriter')
+        return (ENGINES[engine] if isinstance(engine, str) else engine).EXTENSION
+    return '.jsonl' if from_excel.get('lines') else '.json'
+
+
+def find_output(source, ext):
+    """Return the latest output of source, or None if not found.
+    """
+    pattern = '{}_{}{}'.format(glob.escape(os.path.splitext(source)[0]), '[0-9]' * 14, ext)
+    outputs = glob.glob(pattern)
+    return max(outputs) if outputs else None
+
+
+def is_up_to_date(source, output):
+    return output is not None and os.path.getmtime(output) >= os.path.getmtime(source)
+
+
+def convert_file(task, to_excel, from_excel):
+    """Convert a file in a worker process and return Result.
+       Errors are returned in Result not to stop the other files.
+       to_excel: keyword arguments of ToExcel.
+       from_excel: keyword arguments of FromExcel and its convert method.
+    """
+    size = os.path.getsize(task.source)
+    start = time.perf_counter()
+    try:
+        if task.direction == TO_EXCEL:
+            ToExcel(task.source, **to_excel).convert()
+        else:
+            options = dict(from_excel)
+            convert_options = {key: options.pop(key) for key \
+                in ('indent', 'replacement', 'lines') if key in options}
+            with FromExcel(task.source, **options) as converter:
+                converter.convert(**convert_options)
+    except Exception as e:
+        return Result(task.source, task.direction, None, 'failed',
+            time.perf_counter() - start, size, f'{type(e).__name__}: {e}')
+    output = find_output(task.source, output_ext(task.direction, to_excel, from_excel))
+    return Result(task.source, task.direction, output, 'converted',
+        time.perf_counter() - start, size, None)
+
+
+def convert_files(patterns, workers=None, direction=None, force=False,
+        to_excel=None, from_excel=None):
+    """Convert JSON files to Excel and Excel files to JSON in a process pool,
+       and yield Result of each file as soon as it is finished.
+       patterns: glob patterns or directories.
+       workers: number of processes. If None, the number of CPUs is used.
+       direction: 'to_excel' or 'from_excel' to convert only one way.
+       force: If False, files whose output is newer than the file are skipped.
+       to_excel: dict of keyword arguments of ToExcel.
+       from_excel: dict of keyword arguments of FromExcel and its convert method.
+    """
+    to_excel = to_excel or {}
+    from_excel = from_excel or {}
+    tasks = []
+    for task in get_tasks(find_sources(patterns), direction):
+        output = find_output(task.source, output_ext(task.direction, to_excel, from_excel))
+        if not force and is_up_to_date(task.source, output):
+            yield Result(task.source, task.direction, output, 'skipped', 0,
+                os.path.getsize(task.source), None)
+        else:
+            tasks.append(task)
+    if not tasks:
+        return
+    with ProcessPoolExecutor(workers) as executor:
+        futures = {executor.submit(convert_file, task, to_excel, from_excel): task for task in tasks}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                # The worker process died.
+                task = futures[future]
+                yield Result(task.source, task.direction, None, 'failed', 0,
+                    os.path.getsize(task.source), f'{type(e).__name__}: {e}')
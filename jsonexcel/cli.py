@@ -0,0 +1,65 @@
+"""Convert JSON files to Excel and Excel files to JSON in a batch.
+
+   >>>jsonexcel data/ exports/*.xlsx --workers 4
+"""
+import argparse
+import sys
+
+from jsonexcel.batch import convert_files, TO_EXCEL, FROM_EXCEL
+from jsonexcel.convert import ENGINES, JSON_BACKENDS
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(prog='jsonexcel',
+        description='Convert JSON files to Excel files and Excel files to JSON files.')
+    parser.add_argument('paths', nargs='+',
+        help='files, directories or glob patterns')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+        help='number of processes (default: number of CPUs)')
+    parser.add_argument('-d', '--direction', choices=(TO_EXCEL, FROM_EXCEL), default=None,
+        help='convert only one way (default: decided by extension)')
+    parser.add_argument('-f', '--force', action='store_true',
+        help='convert files even if their outputs are up to date')
+    parser.add_argument('--json-backend', choices=tuple(JSON_BACKENDS), default=None)
+    group = parser.add_argument_group('JSON to Excel')
+    group.add_argument('--engine', choices=tuple(ENGINES), default='xlsxwriter')
+    group.add_argument('--sample', type=int, default=None,
+        help='number of records used to decide columns')
+    group.add_argument('--low-memory', action='store_true')
+    group = parser.add_argument_group('Excel to JSON')
+    group.add_argument('--indent', type=int, default=None)
+    group.add_argument('--lines', action='store_true',
+        help='write JSON Lines')
+    group.add_argument('--type-sample', type=int, default=None,
+        help='number of rows used to find data types of columns')
+    return parser
+
+
+def format_result(result):
+    if result.status == 'failed':
+        return f'failed     {result.source}: {result.error}'
+    if result.status == 'skipped':
+        return f'skipped    {result.source}: {result.output} is up to date'
+    return f'converted  {result.source} -> {result.output} ' \
+        f'({result.seconds:.2f} s, {(result.throughput or 0) / 1024 ** 2:.2f} MB/s)'
+
+
+def main(argv=None):
+    """Print the result of each file and return 1 if any file failed.
+    """
+    args = get_parser().parse_args(argv)
+    to_excel = dict(engine=args.engine, sample=args.sample, low_memory=args.low_memory,
+        json_backend=args.json_backend)
+    from_excel = dict(indent=args.indent, lines=args.lines, type_sample=args.type_sample,
+        json_backend=args.json_backend)
+    counts = dict(converted=0, skipped=0, failed=0)
+    for result in convert_files(args.paths, args.workers, args.direction, args.force,
+            to_excel, from_excel):
+        counts[result.status] += 1
+        print(format_result(result), file=sys.stderr if result.status == 'failed' else sys.stdout)
+    print(', '.join(f'{count} {status}' for status, count in counts.items()))
+    return 1 if counts['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,15 +1,30 @@
-from collections import namedtuple
+from collections import deque, namedtuple, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from functools import partial
+from tempfile import TemporaryDirectory, TemporaryFile
 import errno
 import itertools
 import json
+import math
 import os
+import pickle
 import re
+import shutil
+import sys
 
 import openpyxl
 from xlsxwriter.workbook import Workbook
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from jsonexcel.metrics import get_metrics, path_size
+from jsonexcel.progress import NULL_PROGRESS
+from jsonexcel.schema_cache import SchemaCache
+
 
 class NoMoreRecord(Exception):
     pass
@@ -19,31 +34,497 @@ class ExtensionError(Exception):
     pass
 
 
+class SchemaError(Exception):
+    pass
+
+
+class SheetError(Exception):
+    """Raised when rows of a sheet can not be read as records, for example
+       because the sheet was sorted and they are out of order.
+    """
+    pass
+
+
+class JsonStream:
+    """Decode the elements of a top-level JSON array one by one.
+       Only the unread text and the element being decoded are kept in memory.
+       If raw is True, the text of each element is yielded instead.
+       If loads is given, elements in the buffer are decoded at once with it.
+    """
+
+    WHITESPACE = re.compile(r'[ \t\n\r]*')
+    DELIMITERS = frozenset(' \t\n\r,]')
+    BATCH_ATTEMPTS = 4
+
+    def __init__(self, f, chunk_size, raw=False, loads=None):
+        """loads: function to decode JSON text, which raises ValueError
+                  for text it does not decode in the same way as the json
+                  module, like strict_loads of JsonBackend.
+        """
+        self.f = f
+        self.chunk_size = chunk_size
+        self.raw = raw
+        self.loads = loads
+        self.decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        # Elements up to this position are decoded one by one.
+        self.skip = 0
+
+
+    def fill(self, size):
+        """Drop the consumed text and append a chunk read from the file.
+        """
+        chunk = self.f.read(size)
+        self.buf = self.buf[self.pos:] + chunk
+        self.skip = max(self.skip - self.pos, 0)
+        self.pos = 0
+        self.eof = not chunk
+
+
+    def peek(self):
+        """Return the next non-whitespace character, or '' at the end of file.
+        """
+        while True:
+            self.pos = self.WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.eof:
+                return ''
+            self.fill(self.chunk_size)
+
+
+    def decode(self):
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            else:
+                # A number may continue in the next chunk, like '-0.' + '5e10'.
+                if self.eof or self.buf[end:end + 1] in self.DELIMITERS:
+                    if self.raw:
+                        obj = self.buf[self.pos:end]
+                    self.pos = end
+                    return obj
+            # Grow the read size so that a large element is not decoded over and over.
+            self.fill(size)
+            size *= 2
+
+
+    def decode_batch(self):
+        """Decode the elements up to the last '},' in the buffer at once,
+           and return a list of them or None. '},' in an element is found
+           because loads fails on the text cut there, which has an unclosed
+           string, object or array. Then earlier ones are tried, and if
+           all of them fail, the elements are decoded one by one up to them.
+        """
+        if self.pos < self.skip:
+            return None
+        if not self.eof and len(self.buf) - self.pos < self.chunk_size:
+            self.fill(self.chunk_size)
+        end = len(self.buf)
+        for _ in range(self.BATCH_ATTEMPTS):
+            if (cut := self.buf.rfind('},', self.pos, end)) < 0:
+                break
+            try:
+                elements = self.loads('[' + self.buf[self.pos:cut + 1] + ']')
+            except ValueError:
+                end = cut
+                continue
+            self.pos = cut + 1
+            return elements
+        self.skip = end
+        return None
+
+
+    def __iter__(self):
+        if self.peek() != '[':
+            raise json.JSONDecodeError('Expecting array', self.buf, self.pos)
+        self.pos += 1
+        if self.peek() == ']':
+            self.pos += 1
+            self.check_end()
+            return
+        while True:
+            if self.loads and (elements := self.decode_batch()):
+                yield from elements
+            else:
+                yield self.decode()
+            char = self.peek()
+            self.pos += 1
+            if char == ']':
+                self.check_end()
+                return
+            if char != ',':
+                raise json.JSONDecodeError(
+                    "Expecting ',' delimiter", self.buf, self.pos - 1)
+
+
+    def check_end(self):
+        """Only whitespace can follow the array like json.load.
+        """
+        if self.peek():
+            raise json.JSONDecodeError('Extra data', self.buf, self.pos)
+
+
+class JsonBackend:
+    """Encoder and decoder of the json module.
+    """
+
+    name = 'json'
+    separator = ', '
+    # Function for JsonStream to decode elements of JSON array at once.
+    # The json module decodes them one by one.
+    strict_loads = None
+
+    def loads(self, text):
+        """text: str or bytes
+        """
+        return json.loads(text)
+
+
+    def dumps(self, obj, indent=None):
+        """Return str. Non-ASCII characters are not escaped.
+        """
+        return json.dumps(obj, ensure_ascii=False, indent=indent)
+
+
+class OrjsonBackend(JsonBackend):
+    """Encoder and decoder of orjson. Values the json module does not
+       encode in the same way, like integers over 64 bits, NaN, Infinity
+       and datetime, and indents other than 2 spaces are handled by the 
+       json module. The output has the same values as the json module, 
+       but it is formatted differently: no spaces after separators if 
+       indent is None, and exponents of floats like 1e16 for 1e+16.
+    """
+
+    name = 'orjson'
+    separator = ','
+    OPTIONS = orjson and orjson.OPT_PASSTHROUGH_DATETIME \
+        | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_SUBCLASS
+    # orjson decodes integers over 64 bits as float. Texts having 20 digits
+    # in a row, which may be such integers, are decoded by the json module.
+    # They are found by replacing digits with 0, faster than a regex.
+    DIGITS = bytes.maketrans(b'123456789', b'0' * 9)
+    LONG_DIGITS = b'0' * 20
+
+    def loads(self, text):
+        try:
+            return self.strict_loads(text)
+        except ValueError:
+            return super().loads(text)
+
+
+    def strict_loads(self, text):
+        """Raise ValueError for text which is not decoded like the json 
+           module, like NaN, Infinity and integers over 64 bits.
+        """
+        if isinstance(text, str):
+            text = text.encode('utf-8')
+        if self.LONG_DIGITS in text.translate(self.DIGITS):
+            raise ValueError('Integers over 64 bits are not decoded by orjson.')
+        return orjson.loads(text)
+
+
+    def dumps(self, obj, indent=None):
+        if indent is None:
+            option = self.OPTIONS
+        elif indent == 2:
+            option = self.OPTIONS | orjson.OPT_INDENT_2
+        else:
+            return super().dumps(obj, indent)
+        try:
+            text = orjson.dumps(obj, default=not_encodable, option=option)
+        except orjson.JSONEncodeError:
+            return super().dumps(obj, indent)
+        # orjson encodes NaN and Infinity as null.
+        if b'null' in text and has_non_finite(obj):
+            return super().dumps(obj, indent)
+        return text.decode('utf-8')
+
+
+def not_encodable(obj):
+    """default of orjson.dumps to leave the types passed through
+       to the json module.
+    """
+    raise TypeError(f'Object of type {type(obj).__name__} is not encoded by orjson.')
+
+
+def has_non_finite(obj):
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(has_non_finite(val) for val in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(has_non_finite(val) for val in obj)
+    return False
+
+
+JSON_BACKENDS = {backend.name: backend for backend in (JsonBackend, OrjsonBackend)}
+
+
+def get_json_backend(name=None, encode=False):
+    """Return JsonBackend instance. If name is None, orjson is used
+       when it is installed, but the json module is used if encode is 
+       True, because the output of orjson is formatted differently.
+    """
+    if name is None:
+        name = 'json' if orjson is None or encode else 'orjson'
+    if name not in JSON_BACKENDS:
+        raise ValueError(f'json_backend must be one of {tuple(JSON_BACKENDS)}.')
+    if name == 'orjson' and orjson is None:
+        raise ValueError('orjson is not installed.')
+    return JSON_BACKENDS[name]()
+
+
 class JsonFile:
+    """JSON file having an array of records, or JSON Lines file
+       (.jsonl, .ndjson) having a record per line.
+    """
 
-    def __init__(self, file):
+    EXTENSIONS = ('json', 'jsonl', 'ndjson')
+    LINES_EXTENSIONS = ('.jsonl', '.ndjson')
+    CHUNK_SIZE = 1024 * 64
+
+    def __init__(self, file, streaming=True, backend=None):
+        """backend: JsonBackend instance or its name. While streaming JSON
+                    array, elements which are not decoded by its strict_loads
+                    are decoded with the json module.
+        """
         self.file = file
+        self.streaming = streaming
+        self.backend = backend if isinstance(backend, JsonBackend) \
+            else get_json_backend(backend)
+        self.lines = os.path.splitext(file)[-1] in self.LINES_EXTENSIONS
+        self.reading = None
     
 
     def __iter__(self):
+        if self.lines:
+            for line in self.iter_lines():
+                yield self.backend.loads(line)
+            return
+        if not self.streaming:
+            with open(self.file, 'rb') as f:
+                self.reading = f
+                yield from self.backend.loads(f.read())
+            return
+        with open(self.file, 'r', encoding='utf-8') as f:
+            self.reading = f
+            yield from JsonStream(f, self.CHUNK_SIZE, loads=self.backend.strict_loads)
+
+
+    def iter_texts(self):
+        """Yield the text of each element of JSON array, which is decoded
+           in another process.
+        """
         with open(self.file, 'r', encoding='utf-8') as f:
-            for dic in json.load(f):
-                yield dic
+            self.reading = f
+            yield from JsonStream(f, self.CHUNK_SIZE, raw=True)
+
+
+    def position(self):
+        """Return the number of bytes read from the file being read.
+           It includes the bytes buffered but not decoded yet.
+        """
+        if (f := self.reading) is None:
+            return 0
+        if f.closed:
+            return os.path.getsize(self.file)
+        return f.buffer.tell() if hasattr(f, 'buffer') else f.tell()
+
+
+    def iter_lines(self, start=0, end=None):
+        """Yield lines of JSON Lines file as bytes, skipping blank lines.
+           start, end: byte offsets at line boundaries, like ones returned
+                       by split method.
+        """
+        with open(self.file, 'rb') as f:
+            self.reading = f
+            f.seek(start)
+            pos = start
+            for line in f:
+                if end is not None and pos >= end:
+                    break
+                pos += len(line)
+                if line.strip():
+                    yield line
+
+
+    def split(self, parts):
+        """Split JSON Lines file into parts at line boundaries, and return 
+           a list of (start, end) byte offsets. ToExcel passes them to its
+           workers, which read the lines by iter_lines(start, end).
+        """
+        size = os.path.getsize(self.file)
+        offsets = [0]
+        with open(self.file, 'rb') as f:
+            for i in range(1, parts):
+                f.seek(max(size * i // parts, offsets[-1]))
+                if f.tell() > 0:
+                    f.seek(f.tell() - 1)
+                    # Move to the start of the next line.
+                    f.readline()
+                offsets.append(min(f.tell(), size))
+        offsets.append(size)
+        return [(start, end) for start, end in zip(offsets, offsets[1:]) if start < end]
 
 
     def output(self, records, indent):
+        """Write records one by one as soon as they are produced.
+           The output is the same as json.dump(list(records), ...)
+           if the backend is the json module.
+           indent is not used for JSON Lines file.
+        """
+        dumps = self.backend.dumps
+        if self.lines:
+            with open(self.file, 'w', encoding='utf-8') as f:
+                for record in records:
+                    f.write(dumps(record))
+                    f.write('\n')
+            return
+        if indent is None:
+            start, separator, end = '[', self.backend.separator, ']'
+        else:
+            newline = '\n' + (' ' * indent if isinstance(indent, int) else indent)
+            start, separator, end = f'[{newline}', f',{newline}', '\n]'
         with open(self.file, 'w', encoding='utf-8') as f:
-            json.dump(
-                list(records), 
-                f, 
-                ensure_ascii=False,
-                indent=indent
-            )
+            prefix = start
+            for record in records:
+                text = dumps(record, indent)
+                if indent is not None:
+                    # Newlines in strings are escaped.
+                    text = text.replace('\n', newline)
+                f.write(prefix)
+                f.write(text)
+                prefix = separator
+            f.write('[]' if prefix == start else end)
 
 
 Cell = namedtuple('Cell', 'key idx value')
 
 
+def format_idx(idx, hyphen='-'):
+    """Return str of index like '12-0-3' from tuple like (12, 0, 3).
+    """
+    return hyphen.join(map(str, idx))
+
+
+class Cells:
+    """Cells of a record flattened with FlattenPlan. Column keys and
+       positions are shared with the plan, and indexes are tuples like 
+       (12, 0, 3), one for each row of the record. Iteration yields Cell
+       having the index formatted to str.
+    """
+
+    __slots__ = ('plan', 'idxes', 'values')
+
+    def __init__(self, plan, idx, values):
+        self.plan = plan
+        self.idxes = [(idx, *suffix) for suffix in plan.suffixes]
+        self.values = values
+
+
+    def __len__(self):
+        return len(self.values)
+
+
+    def __iter__(self):
+        idxes = [format_idx(idx) for idx in self.idxes]
+        return map(Cell, self.plan.keys, map(idxes.__getitem__, self.plan.positions), self.values)
+
+
+class KeyTranslation(dict):
+    """Memo of keys translated with str.translate.
+    """
+
+    MAXSIZE = 1024 * 64
+
+    def __init__(self, table):
+        super().__init__()
+        self.table = table
+
+
+    def __missing__(self, key):
+        # Keys may be data, like IDs. Do not grow without limit.
+        if len(self) >= self.MAXSIZE:
+            self.clear()
+        translated = self[key] = key.translate(self.table)
+        return translated
+
+
+FlattenPlan = namedtuple('FlattenPlan', 'keys suffixes positions')
+
+
+class FlattenPlans:
+    """LRU cache of FlattenPlan keyed by the shape of dicts.
+       If most of the dicts have different shapes, plans are not used.
+    """
+
+    def __init__(self, maxsize=256, min_lookups=1000):
+        self.maxsize = maxsize
+        self.min_lookups = min_lookups
+        self.plans = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+
+    @property
+    def effective(self):
+        return self.hits + self.misses < self.min_lookups or self.hits >= self.misses
+
+
+    def get(self, shape):
+        if (plan := self.plans.get(shape)) is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.plans.move_to_end(shape)
+        return plan
+
+
+    def add(self, shape, plan):
+        """Return the shape of the plan dropped from the cache, or None.
+        """
+        self.plans[shape] = plan
+        if len(self.plans) > self.maxsize:
+            return self.plans.popitem(last=False)[0]
+        return None
+
+
+PathSegment = namedtuple('PathSegment', 'key name indexes')
+
+
+def compile_path(key_str, dot='.', hyphen='-'):
+    """Split a column name into a tuple of PathSegment.
+       For example, 'aa.bb-0-1' is parsed into 
+       (PathSegment('aa', 'aa', ()), PathSegment('bb-0-1', 'bb', (0, 1))).
+    """
+    path = []
+    for key in key_str.split(dot):
+        name, *indexes = key.split(hyphen)
+        path.append(PathSegment(key, name, tuple(int(i) for i in indexes)))
+    return tuple(path)
+
+
+def select_keys(keys, dot='.', hyphen='-'):
+    """Return dict {prefix: True if it is one of keys}. Prefixes are the parts
+       of keys before DOT or HYPHEN, like 'aa' and 'aa.bb' of 'aa.bb-0'.
+    """
+    selection = {}
+    separator = re.compile(f'[{re.escape(dot)}{re.escape(hyphen)}]')
+    for key in keys:
+        for match in separator.finditer(key):
+            selection.setdefault(key[:match.start()], False)
+        selection[key] = True
+    return selection
+
+
 class ExcelSheet:
 
     MAIN = 'main'
@@ -59,13 +540,20 @@ class ExcelSheet:
 class WritingSheet(ExcelSheet):
 
     URL = r"(https?|ftp)(:\/\/[-_\.!~*\'()a-zA-Z0-9;\/?:\@&=\+$,%#]+)"
+    URL_PREFIXES = ('http', 'ftp')
 
 
-    def __init__(self, sheet, keys, row=0, index=''):
+    def __init__(self, sheet, keys, row=0, index='', plain_text=()):
+        """plain_text: keys of columns whose strings are written 
+                       without URL detection, or True for all columns.
+        """
         super().__init__(sheet)
         self._row = row
         self.index = index
         self.pattern = re.compile(WritingSheet.URL)
+        self.plain_text = plain_text
+        # {col: (type of value, method to write value)}
+        self.writers = {}
         self.set_keys(keys)
     
 
@@ -76,6 +564,14 @@ class WritingSheet(ExcelSheet):
             self.write(0, col, key)
 
 
+    def add_key(self, key):
+        """Add a column to the right end and return the column number.
+        """
+        col = self.keys[key] = max(self.keys.values(), default=0) + 1
+        self.write(0, col, key)
+        return col
+
+
     def column(self, key):
         return self.keys.get(key)
 
@@ -88,24 +584,214 @@ class WritingSheet(ExcelSheet):
 
 
     def write(self, row, col, value, index=''):
+        """The method to write value is cached for each column, and 
+           selected again only when the type of value changes.
+        """
         if index:
             self.sheet.write(row, 0, index)
         if not col:
             return
+        writer = self.writers.get(col)
+        if writer is None or writer[0] is not type(value):
+            writer = self.writers[col] = (type(value), self.get_writer(col, value))
+        writer[1](row, col, value)
+
+
+    def get_writer(self, col, value):
         if type(value) in {float, int}:
-            self.sheet.write_number(row, col, value)
+            return self.sheet.write_number
         elif isinstance(value, list) or value is None:
-            self.sheet.write_blank(row, col, None)
+            return self.write_blank
         elif type(value) == bool:
-            self.sheet.write_boolean(row, col, value)
-        elif self.pattern.match(value):
-            self.sheet.write_url(row, col, value)
+            return self.sheet.write_boolean
         elif isinstance(value, str):
-            self.sheet.write_string(row, col, value)
+            if self.plain_text is True or \
+                    any(self.keys.get(key) == col for key in self.plain_text):
+                return self.sheet.write_string
+            return self.write_string
+        else:
+            return self.sheet.write
+
+
+    def write_blank(self, row, col, value):
+        self.sheet.write_blank(row, col, None)
+
+
+    def write_string(self, row, col, value):
+        """Write value as url if it is like url.
+        """
+        if value.startswith(self.URL_PREFIXES) and self.pattern.match(value):
+            self.sheet.write_url(row, col, value)
         else:
-            self.sheet.write(row, col, value)
+            self.sheet.write_string(row, col, value)
        
 
+class SpooledWorksheet:
+    """Record calls of write methods of xlsxwriter worksheet to a temporary 
+       file, and replay them later. Calls for the header row are kept in memory
+       to be replayed first.
+    """
+
+    BATCH_SIZE = 4096
+    METHODS = ('write', 'write_number', 'write_blank', 'write_boolean', 
+        'write_url', 'write_string')
+
+    def __init__(self, name):
+        self.name = name
+        self.header = []
+        self.calls = []
+        self.spool = TemporaryFile()
+        for method in self.METHODS:
+            setattr(self, method, partial(self.record, method))
+
+
+    def record(self, method, row, col, value):
+        if row == 0:
+            self.header.append((method, row, col, value))
+            return
+        self.calls.append((method, row, col, value))
+        if len(self.calls) >= self.BATCH_SIZE:
+            self.flush()
+
+
+    def flush(self):
+        pickle.dump(self.calls, self.spool, pickle.HIGHEST_PROTOCOL)
+        self.calls = []
+
+
+    def replay(self, worksheet):
+        """Call write methods of worksheet in the recorded order.
+           Rows are written in ascending order.
+        """
+        self.flush()
+        self.spool.seek(0)
+        for calls in itertools.chain([self.header], self.load()):
+            for method, row, col, value in calls:
+                getattr(worksheet, method)(row, col, value)
+
+
+    def load(self):
+        while True:
+            try:
+                yield pickle.load(self.spool)
+            except EOFError:
+                break
+
+
+    def close(self):
+        self.spool.close()
+
+
+class SpooledWorkbook:
+    """Substitute of xlsxwriter Workbook which writes worksheets one by one
+       in constant memory mode when it is closed. xlsxwriter requires rows 
+       to be written in order in the mode, but rows of the main sheet and 
+       child sheets are written alternately, and columns can be added to
+       the header row later.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.worksheets = []
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+    def add_worksheet(self, name):
+        worksheet = SpooledWorksheet(name)
+        self.worksheets.append(worksheet)
+        return worksheet
+
+
+    def close(self):
+        try:
+            with Workbook(self.filename, {'constant_memory': True}) as wb:
+                for worksheet in self.worksheets:
+                    worksheet.replay(wb.add_worksheet(worksheet.name))
+        finally:
+            self.discard()
+
+
+    def discard(self):
+        for worksheet in self.worksheets:
+            worksheet.close()
+
+
+class Engine:
+    """Library to write Excel file. Subclasses registered with register_engine
+       are selected by name with engine argument of ToExcel. Row and column 
+       numbers passed to sheets start from 0 like xlsxwriter, and the header
+       row is 0.
+    """
+
+    name = None
+    EXTENSION = '.xlsx'
+    SUPPORTS_LOW_MEMORY = False
+
+    def __init__(self, low_memory=False, plain_text=()):
+        """low_memory: If True, memory usage is kept low.
+           plain_text: keys of columns whose strings are written 
+                       without URL detection, or True for all columns.
+        """
+        if low_memory and not self.SUPPORTS_LOW_MEMORY:
+            raise ValueError(f'{self.name} engine does not support low_memory.')
+        self.low_memory = low_memory
+        self.plain_text = plain_text
+
+
+    def open(self, filename):
+        """Return workbook object, which is used as context manager 
+           to save Excel file on exit. filename ends with EXTENSION.
+        """
+        raise NotImplementedError()
+
+
+    def add_sheet(self, wb, sh_name, keys):
+        """Add a worksheet to wb and return WritingSheet instance.
+        """
+        raise NotImplementedError()
+
+
+ENGINES = {}
+
+
+def register_engine(engine_class):
+    ENGINES[engine_class.name] = engine_class
+    return engine_class
+
+
+def get_engine(name, **options):
+    if name not in ENGINES:
+        raise ValueError(f'engine must be one of {tuple(ENGINES)}.')
+    return ENGINES[name](**options)
+
+
+@register_engine
+class XlsxWriterEngine(Engine):
+    """Write Excel file with xlsxwriter. In low memory mode, cells are 
+       spooled to temporary files and written in constant memory mode.
+    """
+
+    name = 'xlsxwriter'
+    SUPPORTS_LOW_MEMORY = True
+
+    def open(self, filename):
+        return SpooledWorkbook(filename) if self.low_memory else Workbook(filename)
+
+
+    def add_sheet(self, wb, sh_name, keys):
+        return WritingSheet(wb.add_worksheet(sh_name), keys, plain_text=self.plain_text)
+
+
 class ReadingSheet(ExcelSheet):
 
     def __init__(self, sheet):
@@ -114,8 +800,16 @@ class ReadingSheet(ExcelSheet):
         self.keys = self.set_keys()
         self.max_col = len(self.keys) + 1
         self.max_row = self.sheet.max_row
-        self.data_types = tuple(data_type for data_type in self.get_type())
-        self.row = 2
+        self.rows = None
+        self.data_types = list(self.get_type())
+        if self.rows is None:
+            self.rows = self.iter_rows()
+        self.paths = tuple(compile_path(key) for key in self.keys)
+        self.title_path = compile_path(self.title)
+        self.row = 1
+        self.serial = 0
+        self.next_row = None
+        self.exhausted = False
   
 
     def is_empty(self, cell_value):
@@ -123,8 +817,13 @@ class ReadingSheet(ExcelSheet):
     
 
     def set_keys(self):
-        row = self.sheet[1]
-        return tuple(cell.value for cell in row if not self.is_empty(cell.value))
+        row = next(self.sheet.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        return tuple(val for val in row if not self.is_empty(val))
+
+
+    def iter_rows(self):
+        return self.sheet.iter_rows(
+            min_row=2, max_row=self.max_row, min_col=1, max_col=self.max_col, values_only=True)
 
 
     def get_type(self):
@@ -142,51 +841,164 @@ class ReadingSheet(ExcelSheet):
             yield data_type
 
 
-    def _read(self, cells):
-        for cell, key, data_type in zip(cells, self.keys, self.data_types):
-            if not self.is_empty(val := cell.value):
+    def _read(self, values):
+        for val, path, data_type in zip(values, self.paths, self.data_types):
+            if not self.is_empty(val):
                 val = data_type(val)
                 if data_type == str:
                     # Convert '_x000D_' to '\r'
                     val = openpyxl.utils.escape.unescape(val)
-            yield key, val
+            yield path, val
+
+
+    def get_record(self, idx, values, delimiter):
+        """Return a pair of indexes of dicts in list and a list of (path, value).
+           Indexes do not include the serial number.
+        """
+        idxes = tuple(int(i) for i in str(idx).split(delimiter)[1:])
+        items = list(self._read(values))
+        # If all cells in a row are empty and sheet is Main, value is empty list.
+        if all(self.is_empty(val) for _, val in items) and self.title != ExcelSheet.MAIN:
+            return idxes, [(self.title_path, list())]
+        return idxes, items
+
+
+    def peek(self, delimiter):
+        """Return (serial number, index, values) of the next row, or None
+           if no rows are left, and then exhausted is set to True.
+           Serial numbers must not decrease from the top to the bottom of
+           the sheet, otherwise rows above would be left unread.
+        """
+        if self.next_row is None and not self.exhausted:
+            values = next(self.rows, None)
+            # when formatted cell is found out of data area
+            if values is None or self.is_empty(idx := values[0]):
+                self.exhausted = True
+                return None
+            self.row += 1
+            try:
+                serial = int(str(idx).split(delimiter)[0])
+            except ValueError:
+                raise SheetError(f'{idx!r} in A{self.row} of sheet {self.title} '
+                    'is not an index written by ToExcel.') from None
+            if serial < self.serial:
+                raise SheetError(f'Rows of sheet {self.title} are not in order of '
+                    f'column A: {idx!r} in A{self.row} is below serial number {self.serial}.')
+            self.serial = serial
+            self.next_row = serial, idx, values[1:]
+        return self.next_row
 
 
     def read(self, serial, delimiter):
         """If Rows have the same left number of Indexes(column A) split with hyphen,
            they are on record. For example, 1, 1-1, 1-2, 1-1-1, 1-1-2.   
+           serial: int of the record, which increases at each call.
         """
-        if self.row > self.max_row:
-            raise NoMoreRecord() 
-        min_row = self.row
-        for row in self.sheet.iter_rows(
-                min_row=min_row, max_row = self.max_row, min_col=1, max_col=self.max_col):
-            a_cell = row[0]
-            # when formatted cell is found out of data area
-            if self.is_empty(a_cell.value):
-                raise NoMoreRecord()
-            idx = a_cell.value
-            if idx.split(delimiter)[0] != serial:
-                return
-            self.row += 1
-            record = {(key, idx): val for key, val in self._read(row[1:])}
-            # If all cells in a row are empty and sheet is Main, value is empty list.
-            if all(self.is_empty(val) for val in record.values()) and self.title != ExcelSheet.MAIN:
-                yield {(self.title, f'{idx}'): list()}
-            else:
-                yield record 
+        while (row := self.peek(delimiter)) is not None and row[0] == serial:
+            self.next_row = None
+            yield self.get_record(row[1], row[2], delimiter)
+
+
+    def read_all(self, delimiter):
+        """Yield (serial number, indexes, items) of all rows.
+        """
+        while (row := self.peek(delimiter)) is not None:
+            self.next_row = None
+            yield (row[0], *self.get_record(row[1], row[2], delimiter))
+
+
+class StreamingReadingSheet(ReadingSheet):
+    """ReadingSheet for a worksheet of a read-only workbook. Rows are read
+       with only one iterator from the top to the bottom of the sheet.
+       If type_sample is None, data types are found by reading the sheet 
+       beforehand. Otherwise, they are found in the first type_sample rows
+       and fixed while rows are read, so that the sheet is read only once:
+       a column takes the type of its first value, and int column is 
+       promoted to float when a float is found. Values above the row where
+       a column was promoted are left int. Values of other types below the
+       sample, like a string in int column, are read as they are, while
+       the full scan converts them to the type of the column or raises 
+       ValueError if they can not be converted.
+    """
+
+    def __init__(self, sheet, type_sample=None, progress=NULL_PROGRESS):
+        """progress: Progress instance to report rows read to find data 
+                     types beforehand in 'types' pass and to cancel it.
+        """
+        self.type_sample = type_sample
+        self.progress = progress
+        super().__init__(sheet)
+
+
+    def get_type(self):
+        """Return data types of all columns, scanning the sheet row by row.
+        """
+        data_types = [None] * (self.max_col - 1)
+        fixed = [False] * (self.max_col - 1)
+        if self.type_sample is None:
+            rows = self.progress.iterate('types', self.sheet.iter_rows(min_row=2, 
+                max_row=self.max_row, min_col=1, max_col=self.max_col, values_only=True),
+                total=self.max_row - 1 if self.max_row else None)
+        else:
+            rows = self.iter_rows()
+            sample = list(itertools.islice(rows, self.type_sample))
+            self.rows = itertools.chain(sample, rows)
+            rows = sample
+        for values in rows:
+            for i, val in enumerate(values[1:]):
+                if not fixed[i] and not self.is_empty(val):
+                    data_types[i] = type(val)
+                    # 0.0 is entered into cell as 0.   
+                    fixed[i] = data_types[i] != int
+        return data_types
+
+
+    def _read(self, values):
+        if self.type_sample is None:
+            yield from super()._read(values)
+            return
+        for i, (val, path) in enumerate(zip(values, self.paths)):
+            if not self.is_empty(val):
+                val = self.convert(i, val)
+            yield path, val
+
+
+    def convert(self, i, val):
+        """Convert val to the data type of column i, fixing it if necessary.
+           val is returned as it is if it is not converted without loss.
+        """
+        data_type = self.data_types[i]
+        if data_type is None or data_type is int and type(val) is float:
+            data_type = self.data_types[i] = type(val)
+        if data_type is str:
+            # Convert '_x000D_' to '\r'
+            return openpyxl.utils.escape.unescape(str(val))
+        if data_type is float and type(val) is int:
+            return float(val)
+        return val
+
+
+def remove_output(path):
+    """Remove an output file or directory left by a failed or cancelled
+       conversion, which must not be taken for a complete output.
+    """
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
 
 
 def file_check(path, ext):
     """After the check of path existence and extension,
-       return absolute path. 
+       return absolute path. ext: str or tuple of str
     """
     path = os.path.abspath(path)
     if not os.path.isfile(path):
         raise FileNotFoundError(
             errno.ENOENT, os.strerror(errno.ENOENT), path)
-    if os.path.splitext(path)[-1] != f'.{ext}':
-        raise ExtensionError('{} file is not selected.'.format(ext))
+    exts = (ext,) if isinstance(ext, str) else ext
+    if os.path.splitext(path)[-1] not in {f'.{ext}' for ext in exts}:
+        raise ExtensionError('{} file is not selected.'.format('/'.join(exts)))
     return path
 
 
@@ -205,47 +1017,156 @@ class Convert:
         return path
 
 
+    def translate_key(self, key):
+        """Return key used in column names. Override to replace characters.
+        """
+        return key
+
+
     def serialize(self, dic, idx, pref=''):
         """Flatten dict. 
         """
         for key, val in dic.items():
-            if isinstance(val, dict):
-                yield from self.serialize(val, 
-                    idx, f'{pref}{key}{self.DOT}')
-            elif isinstance(val, list):
-                if val:
-                    for i, list_val in enumerate(val):
-                        if isinstance(list_val, dict):
-                            yield from self.serialize(list_val, 
-                                f'{idx}{self.HYPHEN}{i}', f'{pref}{key}{self.DOT}')
-                        else:
-                            yield from self.serialize({f'{pref}{key}{self.HYPHEN}{i}' : list_val}, idx)
-                else:
-                    yield f'{pref}{key}{self.HYPHEN}{str(0)}', idx, val
+            key = f'{pref}{self.translate_key(key)}'
+            if isinstance(val, (dict, list)):
+                yield from self.serialize_value(val, idx, key)
+            else:
+                yield key, idx, val
+
+
+    def serialize_value(self, val, idx, key):
+        """key: column name of val which is already translated.
+        """
+        if isinstance(val, dict):
+            yield from self.serialize(val, idx, f'{key}{self.DOT}')
+        elif isinstance(val, list):
+            if val:
+                for i, list_val in enumerate(val):
+                    if isinstance(list_val, dict):
+                        yield from self.serialize(list_val, 
+                            f'{idx}{self.HYPHEN}{i}', f'{key}{self.DOT}')
+                    else:
+                        yield from self.serialize_value(list_val, idx, f'{key}{self.HYPHEN}{i}')
             else:
-                yield f'{pref}{key}', idx, val
+                yield f'{key}{self.HYPHEN}{str(0)}', idx, val
+        else:
+            yield key, idx, val
+
+
+    def serialize_selected(self, dic, idx, selection, pref=''):
+        """Yield the items of serialize whose keys are selected.
+           selection: dict returned by select_keys. Values whose keys are
+                      not in selection are skipped without being traversed.
+        """
+        for key, val in dic.items():
+            key = f'{pref}{self.translate_key(key)}'
+            if (selected := selection.get(key)) is None:
+                continue
+            if isinstance(val, (dict, list)):
+                yield from self.serialize_selected_value(val, idx, selection, key)
+            elif selected:
+                yield key, idx, val
+
+
+    def serialize_selected_value(self, val, idx, selection, key):
+        """key: column name of val which is in selection.
+        """
+        if isinstance(val, dict):
+            yield from self.serialize_selected(val, idx, selection, f'{key}{self.DOT}')
+        elif isinstance(val, list):
+            if val:
+                for i, list_val in enumerate(val):
+                    if isinstance(list_val, dict):
+                        yield from self.serialize_selected(list_val, 
+                            f'{idx}{self.HYPHEN}{i}', selection, f'{key}{self.DOT}')
+                    elif (item_key := f'{key}{self.HYPHEN}{i}') in selection:
+                        yield from self.serialize_selected_value(list_val, idx, selection, item_key)
+            elif selection.get(item_key := f'{key}{self.HYPHEN}0'):
+                yield item_key, idx, val
+        elif selection[key]:
+            yield key, idx, val
+
+
+    def shape(self, val, append):
+        """Return hashable shape of val, and pass values in val to append
+           in the same order as serialize yields them. In shape, 0 is value,
+           1 is empty list, 2 starts dict and 3 starts list. 
+        """
+        if type(val) is dict:
+            shape = [2]
+            for key, item in val.items():
+                shape.append(key)
+                if type(item) is dict or type(item) is list and item:
+                    shape.append(self.shape(item, append))
+                else:
+                    append(item)
+                    shape.append(1 if type(item) is list else 0)
+            return tuple(shape)
+        if type(val) is list and val:
+            return (3, *[self.shape(item, append) for item in val])
+        append(val)
+        return 1 if type(val) is list else 0
+
+
+    def compile_plan(self, dic):
+        return self.make_plan(self.serialize(dic, ''))
+
+
+    def make_plan(self, items):
+        """items: (key, index suffix, value) yielded by serialize with idx ''.
+           Index suffixes like '-0-3' are converted to tuples like (0, 3).
+           Keys are interned, because they are shared by many plans.
+        """
+        keys, suffixes, positions = [], {}, []
+        for key, suffix, _ in items:
+            keys.append(sys.intern(key))
+            positions.append(suffixes.setdefault(suffix, len(suffixes)))
+        suffixes = (tuple(int(i) for i in suffix.split(self.HYPHEN)[1:]) for suffix in suffixes)
+        return FlattenPlan(tuple(keys), tuple(suffixes), tuple(positions))
+
+
+    def flatten(self, dic, idx):
+        """Return Cells, which yields the same items as serialize. Column 
+           keys and index suffixes are computed once for dicts of the same 
+           shape. If plans are not effective, return serialize generator.
+        """
+        if not self.plans.effective:
+            return self.serialize(dic, str(idx))
+        leaves = []
+        shape = self.shape(dic, leaves.append)
+        if (plan := self.plans.get(shape)) is None:
+            plan = self.compile_plan(dic)
+            self.plans.add(shape, plan)
+        return Cells(plan, idx, leaves)
 
 
     def parse_json(self, dic, group, pref=''):
         """Return a pair of sheet name and column name.
         """
         for key, val in dic.items():
-            if isinstance(val, dict):
-                yield from self.parse_json(
-                    val, group, f'{pref}{key}{self.DOT}')
-            elif isinstance(val, list):
-                if val:
-                    for i, list_val in enumerate(val):
-                        if isinstance(list_val, dict):
-                            yield from self.parse_json(
-                                list_val, f'{pref}{key}', f'{pref}{key}{self.DOT}')
-                        else:
-                            yield from self.parse_json(
-                                {f'{pref}{key}{self.HYPHEN}{i}' : list_val}, group)
-                else:
-                    yield group, f'{pref}{key}{self.HYPHEN}{str(0)}'
+            key = f'{pref}{self.translate_key(key)}'
+            if isinstance(val, (dict, list)):
+                yield from self.parse_value(val, group, key)
             else:
-                yield group, f'{pref}{key}'
+                yield group, key
+
+
+    def parse_value(self, val, group, key):
+        """key: column name of val which is already translated.
+        """
+        if isinstance(val, dict):
+            yield from self.parse_json(val, group, f'{key}{self.DOT}')
+        elif isinstance(val, list):
+            if val:
+                for i, list_val in enumerate(val):
+                    if isinstance(list_val, dict):
+                        yield from self.parse_json(list_val, key, f'{key}{self.DOT}')
+                    else:
+                        yield from self.parse_value(list_val, group, f'{key}{self.HYPHEN}{i}')
+            else:
+                yield group, f'{key}{self.HYPHEN}{str(0)}'
+        else:
+            yield group, key
 
 
     def set_obj_to_list(self, li, idx, obj):
@@ -275,36 +1196,45 @@ class Convert:
         return li
 
 
-    def _deserialize(self, new_dic, keys, idxes, val):
-        if not idxes: # the first level
-            if len(keys) == 1:
-                if self.HYPHEN in keys[0]: # Value is list
-                    split_keys = keys[0].split(self.HYPHEN)
-                    # If split_keys[1:-1] is not empty, li is nested list
-                    li = self.set_nested_list(
-                        self.set_obj_to_dict(new_dic, split_keys[0], list), split_keys[1:-1])
-                    if val: 
-                        li.append(val)
-                else: # Value is not list
-                    new_dic[keys[0]] = val
-            else: # Nested dict
-                dic = self.set_obj_to_dict(new_dic, keys[0], dict)
-                self._deserialize(dic, keys[1:], idxes, val)
-        else: # Dict in list
-            split_keys = keys[0].split(self.HYPHEN)
-            # If split_keys[1:-1] is not empty, li is nested list
-            li = self.set_nested_list(
-                self.set_obj_to_dict(new_dic, split_keys[0], list), split_keys[1:])
-            dic = self.set_obj_to_list(li, idxes[0], dict)
-            self._deserialize(dic, keys[1:], idxes[1:], val)
+    def insert_path(self, new_dic, path, idxes, val):
+        """path: tuple of PathSegment, idxes: indexes of dicts in list, 
+           which does not include the serial number.
+        """
+        dic = new_dic
+        last = len(path) - 1
+        j = 0
+        for i, (key, name, indexes) in enumerate(path):
+            if j < len(idxes): # Dict in list
+                # If indexes is not empty, li is nested list
+                li = self.set_nested_list(
+                    self.set_obj_to_dict(dic, name, list), indexes)
+                dic = self.set_obj_to_list(li, idxes[j], dict)
+                j += 1
+            elif i < last: # Nested dict
+                dic = self.set_obj_to_dict(dic, key, dict)
+            elif indexes: # Value is list
+                # If indexes[:-1] is not empty, li is nested list
+                li = self.set_nested_list(
+                    self.set_obj_to_dict(dic, name, list), indexes[:-1])
+                if val: 
+                    li.append(val)
+            else: # Value is not list
+                dic[key] = val
+
+
+    def insert(self, new_dic, key_str, idx_str, val):
+        """Insert a value into new_dic, creating nested dicts and lists 
+           on the way.
+        """
+        path = compile_path(key_str, self.DOT, self.HYPHEN)
+        idxes = [int(idx) for idx in idx_str.split(self.HYPHEN)]
+        self.insert_path(new_dic, path, idxes[1:], val)
 
 
     def deserialize(self, dic):
         new_dic = {}
         for (key_str, idx_str), val in dic.items():
-            keys =key_str.split(self.DOT)
-            idxes = [int(idx) for idx in idx_str.split(self.HYPHEN)]
-            self._deserialize(new_dic, keys, idxes[1:], val)
+            self.insert(new_dic, key_str, idx_str, val)
         return new_dic
 
 
@@ -370,66 +1300,373 @@ class Convert:
             yield '.'.join(li[:i]), li[:i][-1] 
 
 
+class FlattenWorker(Convert):
+    """Decode and flatten records in a worker process of ToExcel. 
+       FlattenPlan is sent to ToExcel once with its id, and records are
+       returned as the ids and values to be written as Cells.
+    """
+
+    def __init__(self, json_file, replacement, backend, columns):
+        """columns: If True, columns of records found by parse_json are
+                    returned with plans to add late columns.
+        """
+        self.json = JsonFile(json_file, backend=backend)
+        self.translate_key = KeyTranslation(str.maketrans(replacement)).__getitem__
+        self.plans = FlattenPlans()
+        self.plan_ids = {}
+        self.ids = itertools.count()
+        self.columns = columns
+
+
+    def flatten_records(self, texts, selection):
+        """texts: (start, end) byte offsets of JSON Lines file returned by
+                  JsonFile.split, or a list of texts of records.
+           selection: dict returned by select_keys or None.
+           Return the process id, new plans {id: (FlattenPlan, columns)}, 
+           ids of plans dropped from the cache, and a list of (plan id, 
+           values) of records. Plans which are not cached, like ones of 
+           selected keys, are returned in place of the ids.
+        """
+        if type(texts) is tuple:
+            texts = self.json.iter_lines(*texts)
+        new_plans, dropped, records = {}, [], []
+        for text in texts:
+            dic = self.json.backend.loads(text)
+            if selection is None and self.plans.effective:
+                values = []
+                shape = self.shape(dic, values.append)
+                if self.plans.get(shape) is None:
+                    plan = self.compile_plan(dic)
+                    if (old_shape := self.plans.add(shape, plan)) is not None:
+                        dropped.append(self.plan_ids.pop(old_shape))
+                    plan_id = self.plan_ids[shape] = next(self.ids)
+                    new_plans[plan_id] = plan, self.get_columns(dic)
+                records.append((self.plan_ids[shape], values))
+            else:
+                items = list(self.serialize(dic, '') if selection is None \
+                    else self.serialize_selected(dic, '', selection))
+                records.append(((self.make_plan(items), self.get_columns(dic)),
+                    [value for _, _, value in items]))
+        return os.getpid(), new_plans, dropped, records
+
+
+    def get_columns(self, dic):
+        return tuple(self.parse_json(dic, group=ExcelSheet.MAIN)) if self.columns else None
+
+
+worker = None
+
+
+def init_worker(json_file, replacement, backend, columns):
+    global worker
+    worker = FlattenWorker(json_file, replacement, backend, columns)
+
+
+def flatten_records(args):
+    return worker.flatten_records(*args)
+
+
 class ToExcel(Convert):
     """Write data in json file to worksheets in Excel.
     """
 
-    def __init__(self, json_file):
-        json_file = file_check(json_file, 'json')
-        self.json = JsonFile(json_file)
+    LATE_COLUMNS = ('append', 'ignore', 'error')
+    RECORDS_PER_TASK = 256
+    BYTES_PER_TASK = 1024 * 256
+
+    def __init__(self, json_file, single_pass=False, schema_cache=False,
+            sample=None, schema=None, late_columns='append', workers=None, 
+            json_backend=None, plain_text=None, low_memory=False, engine='xlsxwriter',
+            metrics=None, progress=None):
+        """schema_cache: SchemaCache instance or True to use the default cache
+                         directory, to reuse sheet_format found in the last
+                         conversion of the same file. False not to cache it.
+           sample: number of records from the top used to create sheet_format.
+           schema: dict {column name: sheet name} used as sheet_format.
+           late_columns: how to handle columns not found in sample or schema.
+                         'append' adds them to the right end of the sheet,
+                         'ignore' drops them and 'error' raises SchemaError.
+           workers: number of processes to decode and flatten records. 
+                    Records are written in this process. In single pass 
+                    mode, where records are decoded here to find columns,
+                    they are flattened here too.
+           json_backend: 'json' or 'orjson' to decode JSON. If None, orjson
+                         is used when it is installed.
+           plain_text: column names whose values are written as strings
+                       even if they are like url, or True for all columns.
+           low_memory: If True, cells are spooled to temporary files and 
+                       written to Excel in constant memory mode.
+           engine: name of library to write Excel file, 'xlsxwriter' or
+                   'pyexcelerate', or Engine instance.
+           metrics: Metrics instance or True to collect seconds of phases
+                    ('read', 'schema', 'flatten', 'write', 'save') and
+                    counters. If None, nothing is collected.
+           progress: Progress instance to report bytes of JSON file read
+                     in 'schema' and 'convert' passes and to cancel them.
+        """
+        if late_columns not in self.LATE_COLUMNS:
+            raise ValueError(f'late_columns must be one of {self.LATE_COLUMNS}.')
+        json_file = file_check(json_file, JsonFile.EXTENSIONS)
+        self.json = JsonFile(json_file, backend=json_backend)
         self.set_replace_func(
             {self.HYPHEN: '_', self.DOT: '_'})
         self.sheet_format = {}
+        self.single_pass = single_pass
+        self.sample = sample
+        self.schema = schema
+        self.late_columns = late_columns
+        self.plans = FlattenPlans()
+        self.workers = workers
+        plain_text = plain_text if plain_text is True else frozenset(plain_text or ())
+        self.engine = engine if isinstance(engine, Engine) \
+            else get_engine(engine, low_memory=low_memory, plain_text=plain_text)
+        self.schema_cache = SchemaCache() if schema_cache is True \
+            else schema_cache or None
+        self.metrics = get_metrics(metrics)
+        self.progress = progress or NULL_PROGRESS
         # self.sheets = None
    
 
-    def read_json(self):
-        for dic in self.json:
-            yield self._replace(dic)
+    def read_json(self, phase='convert'):
+        """Keys are not replaced here. They are translated while
+           records are flattened. 
+           phase: name of the pass reported to progress.
+        """
+        return self.track_progress(phase, self.metrics.iterate('read', self.json))
+
+
+    def track_progress(self, phase, dics, position=None):
+        return self.progress.iterate(
+            phase, dics, position or self.json.position, os.path.getsize(self.json.file))
     
 
     def set_replace_func(self, replacement): 
-        table = str.maketrans(replacement)
-        _replace = lambda x: x.translate(table)
-        self._replace = partial(self.replace, _replace)
+        self.replacement = replacement
+        self.translate_key = KeyTranslation(str.maketrans(replacement)).__getitem__
     
+
+    def update_sheet_format(self, dic):
+        for group, key in self.parse_json(dic, group=ExcelSheet.MAIN): 
+            if key not in self.sheet_format:
+                self.sheet_format[key] = group
+
     
     def set_sheet_format(self):
         """Create dict {column name: Column namedtuple}
         """
-        if not self.sheet_format:
-            for dic in self.read_json():
-                for group, key in self.parse_json(dic, group=ExcelSheet.MAIN): 
-                    if key not in self.sheet_format.keys():
-                        self.sheet_format[key] = group
+        if self.sheet_format:
+            return
+        if self.schema is not None:
+            self.sheet_format = dict(self.schema)
+        elif not self.load_sheet_format():
+            try:
+                for dic in itertools.islice(self.read_json('schema'), self.sample):
+                    self.update_sheet_format(dic)
+            except BaseException:
+                # Columns found so far must not be used, e.g. after cancelled.
+                self.sheet_format = {}
+                raise
+            self.save_sheet_format()
+
+
+    @property
+    def partial_schema(self):
+        """True if sheet_format may not have all of the columns.
+        """
+        return self.sample is not None or self.schema is not None
+
+
+    def add_late_columns(self, cells, dic=None, columns=None):
+        """Add columns not found in sheet_format, and return cells
+           after handling them according to late_columns.
+           columns: pairs of sheet name and column name of the record 
+                    found by parse_json, used instead of dic.
+        """
+        if type(cells) is Cells and all(key in self.sheet_format for key in cells.plan.keys):
+            return cells
+        cells = list(cells)
+        if all(cell.key in self.sheet_format for cell in cells):
+            return cells
+        if self.late_columns == 'ignore':
+            return [cell for cell in cells if cell.key in self.sheet_format]
+        if self.late_columns == 'error':
+            key = next(cell.key for cell in cells if cell.key not in self.sheet_format)
+            raise SchemaError(f'{key} is not found in the schema.')
+        sheet_names = set(self.sheet_format.values())
+        if columns is None:
+            columns = self.parse_json(dic, group=ExcelSheet.MAIN)
+        for group, key in columns:
+            if key not in self.sheet_format:
+                # The same rule as in set_sheets
+                if key.endswith(f'{self.HYPHEN}0') and key[:-2] in sheet_names:
+                    group = key[:-2]
+                self.sheet_format[key] = group
+        return cells
+
+
+    def schema_variant(self):
+        """Return str identifying settings which change sheet_format.
+        """
+        return json.dumps([sorted(self.replacement.items()), self.sample])
+
+
+    def load_sheet_format(self):
+        """Set sheet_format from the schema cache. Return True if found.
+        """
+        if self.schema_cache and self.schema is None:
+            if cached := self.schema_cache.get(self.json.file, self.schema_variant()):
+                self.sheet_format = cached
+                return True
+        return False
+
+
+    def save_sheet_format(self):
+        if self.schema_cache:
+            try:
+                self.schema_cache.set(self.json.file, self.sheet_format, self.schema_variant())
+            except OSError:
+                # Conversion does not need the cache.
+                pass
+
+
+    def discover_sheet_format(self):
+        """Yield dicts, updating sheet_format with each of them.
+        """
+        for dic in self.read_json('schema'):
+            self.update_sheet_format(dic)
+            yield dic
        
 
-    def get_selected_records(self, keys):
-        for i, dic in enumerate(self.read_json(), 1):
-            yield (Cell(key, idx, val) for key, idx, val \
-                in self.serialize(dic, str(i)) if key in keys)
+    def get_selected_records(self, keys, dics=None):
+        selection = select_keys(keys, self.DOT, self.HYPHEN)
+        if dics is None and self.workers and self.workers > 1:
+            yield from self.get_parallel_records(selection)
+            return
+        if dics is None:
+            dics = self.read_json()
+        for i, dic in enumerate(dics, 1):
+            cells = (Cell(key, idx, val) for key, idx, val \
+                in self.serialize_selected(dic, str(i), selection))
+            yield self.add_late_columns(cells, dic) if self.partial_schema else cells
 
 
     def partial_convert(self, *keys):
-        self.set_sheet_format()
-        self.sheet_format = {key: val for key, val \
-            in self.sheet_format.items() if key in keys}
-        records = self.get_selected_records(keys)
-        self.output(records)
-        self.sheet_format = {}
+        try:
+            with self.metrics.phase('schema'):
+                records = self.prepare_records(self.get_selected_records, keys)
+            self.sheet_format = {key: val for key, val \
+                in self.sheet_format.items() if key in keys}
+            self.output(records)
+        finally:
+            self.sheet_format = {}
+
+
+    def get_records(self, dics=None):
+        if dics is None and self.workers and self.workers > 1:
+            yield from self.get_parallel_records()
+            return
+        if dics is None:
+            dics = self.read_json()
+        for i, dic in enumerate(dics, 1):
+            if type(cells := self.flatten(dic, i)) is not Cells:
+                cells = map(Cell._make, cells)
+            yield self.add_late_columns(cells, dic) if self.partial_schema else cells
+
+
+    def get_parallel_records(self, selection=None):
+        """Flatten records in a process pool. The workers decode records 
+           from byte ranges of JSON Lines file, or from texts of elements of
+           JSON array found here, and return values with ids of FlattenPlan
+           to be written as Cells. Only a few tasks per worker are processed
+           at the same time, and their results are yielded in the original 
+           order.
+        """
+        done = [0]
+        return self.track_progress(
+            'convert', self.run_tasks(selection, done), lambda: done[0])
 
 
-    def get_records(self):
-        for i, dic in enumerate(self.read_json(), 1):
-            yield (Cell(key, idx, val) for key, idx, val \
-                in self.serialize(dic, str(i)))
+    def get_tasks(self):
+        """Yield texts of records passed to a worker, and bytes of JSON file
+           read when they are flattened.
+        """
+        if self.json.lines:
+            parts = os.path.getsize(self.json.file) // self.BYTES_PER_TASK + 1
+            for start, end in self.json.split(parts):
+                yield (start, end), end
+            return
+        texts = self.metrics.iterate('read', self.json.iter_texts())
+        while chunk := list(itertools.islice(texts, self.RECORDS_PER_TASK)):
+            yield chunk, self.json.position()
+
+
+    def run_tasks(self, selection, done):
+        """Yield Cells of records. done[0] is set to bytes of JSON file 
+           whose records are yielded.
+        """
+        tasks = self.get_tasks()
+        pending = deque()
+        # {process id: {plan id: (FlattenPlan, columns)}}
+        plans = {}
+        i = 0
+        initargs = (self.json.file, self.replacement, self.json.backend.name,
+            self.partial_schema and self.late_columns == 'append')
+        with ProcessPoolExecutor(self.workers, initializer=init_worker, initargs=initargs) as executor:
+            while True:
+                while len(pending) < self.workers * 2 and (task := next(tasks, None)):
+                    texts, end = task
+                    pending.append((executor.submit(flatten_records, (texts, selection)), end))
+                if not pending:
+                    break
+                future, done[0] = pending.popleft()
+                pid, new_plans, dropped, records = future.result()
+                worker_plans = plans.setdefault(pid, {})
+                worker_plans.update(new_plans)
+                for ref, values in records:
+                    i += 1
+                    plan, columns = worker_plans[ref] if type(ref) is int else ref
+                    cells = Cells(plan, i, values)
+                    yield self.add_late_columns(cells, columns=columns) \
+                        if self.partial_schema else cells
+                for plan_id in dropped:
+                    del worker_plans[plan_id]
 
 
     def convert(self):
-        self.set_sheet_format()
-        records = self.get_records()
-        self.output(records)
-        self.sheet_format = {}
+        try:
+            with self.metrics.phase('schema'):
+                records = self.prepare_records(self.get_records)
+            self.output(records)
+        finally:
+            self.sheet_format = {}
+
+
+    def prepare_records(self, get_records, *args):
+        """Set sheet_format and return records to be written.
+           In single pass mode, the JSON file is parsed only once: records
+           are serialized to a temporary file while sheet_format is created,
+           and then read back from it.
+        """
+        if not self.single_pass or self.partial_schema or self.sheet_format \
+                or self.load_sheet_format():
+            self.set_sheet_format()
+            return get_records(*args)
+        spill = TemporaryFile()
+        for record in get_records(*args, self.discover_sheet_format()):
+            pickle.dump([tuple(cell) for cell in record], spill, pickle.HIGHEST_PROTOCOL)
+        self.save_sheet_format()
+        spill.seek(0)
+        return self.load_spill(spill)
+
+
+    def load_spill(self, spill):
+        with spill:
+            while True:
+                try:
+                    cells = pickle.load(spill)
+                except EOFError:
+                    break
+                yield (Cell._make(cell) for cell in cells)
      
 
     def set_sheets(self, wb):
@@ -437,7 +1674,9 @@ class ToExcel(Convert):
            If a key is equal to sh_name directory connected to HYPHEN,
            the key is empty object list.
         """
+        self.wb = wb
         self.sheets = {}
+        self.targets = {}
         # Change sh_name if key is sh_name connected to directory HYPHEN 
         for sh_name in set(self.sheet_format.values()):
             for key in self.sheet_format.keys():
@@ -445,31 +1684,115 @@ class ToExcel(Convert):
                     self.sheet_format[key] = sh_name
         for sh_name in self.sheet_format.values():
             if sh_name not in self.sheets:
-                self.sheets[sh_name] = WritingSheet(
-                    wb.add_worksheet(sh_name),
+                self.sheets[sh_name] = self.add_sheet(
+                    sh_name,
                     sorted(key for key, val in self.sheet_format.items() \
                         if val == sh_name and key != f'{sh_name}-0')
                 )
 
+
+    def add_sheet(self, sh_name, keys):
+        return self.engine.add_sheet(self.wb, sh_name, keys)
+
   
+    def get_target(self, key):
+        """Return a pair of sheet and column number to write the value of key.
+           Sheets and columns which are not created yet are added for
+           late columns.
+        """
+        sh_name = self.sheet_format.get(key)
+        if (sheet := self.sheets.get(sh_name)) is None:
+            sheet = self.sheets[sh_name] = self.add_sheet(sh_name, [])
+        if (col := sheet.column(key)) is None and key != f'{sh_name}-0':
+            col = sheet.add_key(key)
+        return sheet, col
+
+
+    def get_targets(self, plan):
+        """Return a list of targets of keys of FlattenPlan, 
+           which are found once for each plan.
+        """
+        entry = self.targets.get(id(plan))
+        if entry is None or entry[0] is not plan:
+            # Plans may be dropped from the LRU cache.
+            if len(self.targets) >= self.plans.maxsize * 4:
+                self.targets.clear()
+            entry = self.targets[id(plan)] = (plan, [self.get_target(key) for key in plan.keys])
+        return entry[1]
+
+
     def write(self, cell):
         """Get column and row numbers to write value to worksheet.
         """
-        sh_name = self.sheet_format.get(cell.key)
-        sheet = self.sheets[sh_name]
-        col = sheet.column(cell.key)
+        sheet, col = self.get_target(cell.key)
         idx = cell.idx if sheet.index != cell.idx else ''
         row = sheet.row(cell.idx)
         sheet.write(row, col, cell.value, idx)
+
+
+    def write_cells(self, cells):
+        """Write Cells without creating Cell. Indexes are formatted to str 
+           only when they are written to column A.
+        """
+        idxes = cells.idxes
+        for (sheet, col), pos, value in zip(
+                self.get_targets(cells.plan), cells.plan.positions, cells.values):
+            idx = idxes[pos]
+            index = format_idx(idx, self.HYPHEN) if sheet.index != idx else ''
+            sheet.write(sheet.row(idx), col, value, index)
         
 
     def output(self, records):
-        excel_file = self.get_file_path(self.json.file, '.xlsx')
-        with Workbook(excel_file) as wb:
-            self.set_sheets(wb)
-            for record in records:
-                for cell in record:
-                    self.write(cell)
+        """Time to get records is counted as 'flatten', and time to
+           open and close the workbook as 'save'.
+        """
+        excel_file = self.get_file_path(self.json.file, self.engine.EXTENSION)
+        metrics = self.metrics
+        n_records = n_cells = 0
+        try:
+            with metrics.phase('save'), self.engine.open(excel_file) as wb, metrics.phase('write'):
+                self.set_sheets(wb)
+                for record in metrics.iterate('flatten', records):
+                    n_records += 1
+                    if type(record) is Cells:
+                        self.write_cells(record)
+                        n_cells += len(record)
+                    else:
+                        for cell in metrics.iterate('flatten', record):
+                            self.write(cell)
+                            n_cells += 1
+        except BaseException:
+            remove_output(excel_file)
+            raise
+        if metrics.enabled:
+            metrics.count('records', n_records)
+            metrics.count('cells', n_cells)
+            metrics.count('sheets', len(self.sheets))
+            metrics.count('input_bytes', os.path.getsize(self.json.file))
+            metrics.count('output_bytes', path_size(excel_file))
+        metrics.finish()
+
+
+def read_sheet(args):
+    """Read all rows of a sheet in a worker process of FromExcel, and
+       write lists of (serial number, indexes, items) to spool file.
+    """
+    excel_file, title, read_only, type_sample, delimiter, spool = args
+    wb = openpyxl.load_workbook(excel_file, read_only=read_only)
+    try:
+        sheet = StreamingReadingSheet(wb[title], type_sample) if read_only \
+            else ReadingSheet(wb[title])
+        with open(spool, 'wb') as f:
+            rows = []
+            for row in sheet.read_all(delimiter):
+                rows.append(row)
+                if len(rows) >= FromExcel.ROWS_PER_BATCH:
+                    # Paths shared by rows are pickled once in a batch.
+                    pickle.dump(rows, f, pickle.HIGHEST_PROTOCOL)
+                    rows = []
+            pickle.dump(rows, f, pickle.HIGHEST_PROTOCOL)
+    finally:
+        wb.close()
 
 
 class FromExcel(Convert):
@@ -477,10 +1800,37 @@ class FromExcel(Convert):
        It is necessary to use Excel file created using ToExcel instance.
     """
 
-    def __init__(self, excel_file):
+    ROWS_PER_BATCH = 1024
+
+    def __init__(self, excel_file, read_only=True, type_sample=None, json_backend=None,
+            workers=None, metrics=None, progress=None):
+        """read_only: If True, the workbook is not loaded into memory,
+                      and each sheet is read in a single pass.
+           type_sample: In read-only mode, number of rows used to find data 
+                        types of columns before reading records. If None,
+                        all rows are scanned beforehand.
+           json_backend: 'json' or 'orjson' to encode JSON. If None, the
+                         json module is used. orjson is faster, but its
+                         output is formatted differently.
+           workers: number of processes to read sheets. Each sheet is read
+                    in a process, and rows are merged into records here.
+           metrics: Metrics instance or True to collect seconds of phases
+                    ('open', 'read', 'replace', 'write') and counters.
+                    If None, nothing is collected.
+           progress: Progress instance to report rows read to find data
+                     types in 'types' pass, and records written in 
+                     'convert' pass, and to cancel them.
+        """
         self.excel_file = file_check(excel_file, 'xlsx')
-        self.wb = openpyxl.load_workbook(self.excel_file)
+        self.read_only = read_only
+        self.type_sample = type_sample
+        self.json_backend = get_json_backend(json_backend, encode=True)
+        self.workers = workers
+        self.metrics = get_metrics(metrics)
+        self.progress = progress or NULL_PROGRESS
+        self.wb = None
         self.sheets = None
+        self.open()
         
         
     def set_sheets(self):
@@ -488,36 +1838,167 @@ class FromExcel(Convert):
            return the workbook object.
         """
         if self.sheets is None:
-            self.sheets = tuple(ReadingSheet(sh) for sh \
-                in self.wb if sh.cell(row=2, column=1).value)
+            if self.read_only:
+                sheet_class = partial(StreamingReadingSheet, 
+                    type_sample=self.type_sample, progress=self.progress)
+            else:
+                sheet_class = ReadingSheet
+            self.sheets = tuple(sheet_class(sh) for sh \
+                in self.open() if sh.cell(row=2, column=1).value)
+
+
+    def open(self):
+        """Load the workbook unless it is loaded, and return it.
+        """
+        if self.wb is None:
+            with self.metrics.phase('open'):
+                self.wb = self.load_workbook()
+        return self.wb
+
+
+    def load_workbook(self):
+        return openpyxl.load_workbook(self.excel_file, read_only=self.read_only)
+
+
+    def close(self):
+        """Close the workbook file, which is kept open in read-only mode.
+           convert calls this when it is finished, and the workbook is
+           loaded again when it is needed.
+        """
+        if self.wb is not None:
+            self.wb.close()
+            self.wb = None
+        self.sheets = None
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
       
 
-    def convert(self, indent=None, replacement=None):
-        self.set_sheets()
+    def convert(self, indent=None, replacement=None, lines=False):
+        """lines: If True, records are written to JSON Lines file (.jsonl)
+                  a record per line, and indent is not used.
+        """
+        if self.workers and self.workers > 1:
+            records = self.read_parallel()
+        else:
+            # 'types' pass is finished before 'convert' pass.
+            self.set_sheets()
+            records = self.read()
+        records = self.metrics.iterate('read', records)
+        records = self.progress.iterate('convert', records,
+            total=self.count_records() if self.progress.enabled else None)
         if replacement:
             replacement = tuple(sorted(replacement.items(), 
                 key=lambda x: x[0], reverse=True))
             _replace = partial(self.replace_selected_keys, replacement)
-            records = (_replace(record) for record in self.read())
-        else:
-            records = self.read()
-        self.output(records, indent)
-        self.sheets = None
+            records = self.metrics.iterate('replace', (_replace(record) for record in records))
+        try:
+            self.output(records, indent, lines)
+        finally:
+            self.close()
+
+
+    def count_records(self):
+        """Return the number of rows of the main sheet except the header,
+           or None if it is unknown.
+        """
+        for sh in self.open():
+            if sh.title == ExcelSheet.MAIN:
+                return sh.max_row - 1 if sh.max_row else None
+        return None
      
     
     def read(self):
+        """Records end when all of the sheets are exhausted. Child sheets
+           may end before the main sheet, and records without values in the
+           main sheet may follow it. Each row is inserted into the record
+           as soon as it is read. SheetError is raised for rows out of
+           order, which would never be read otherwise.
+        """
+        self.set_sheets()
+        n_cells = 0
         for i in itertools.count(1):
             dic = {}
-            try:
-                for sheet in self.sheets:
-                    for record in sheet.read(str(i), self.HYPHEN):
-                        dic = {**dic, **record}
-                yield self.deserialize(dic)         
-            except NoMoreRecord:
+            found = False
+            for sheet in self.sheets:
+                for idxes, items in sheet.read(i, self.HYPHEN):
+                    found = True
+                    n_cells += len(items)
+                    for path, val in items:
+                        self.insert_path(dic, path, idxes, val)
+            if not found and all(sheet.exhausted for sheet in self.sheets):
                 break
+            yield dic
+        self.metrics.count('records', i - 1)
+        self.metrics.count('cells', n_cells)
+        self.metrics.count('sheets', len(self.sheets))
 
 
-    def output(self, records, indent):
-        output_file = self.get_file_path(self.excel_file, '.json')
-        json_file = JsonFile(output_file)
-        json_file.output(records, indent)
\ No newline at end of file
+    def read_parallel(self):
+        """Read sheets in a process pool, and merge their rows into records
+           in the order of serial numbers. Rows are passed through spool files
+           not to be kept in memory.
+        """
+        titles = [sh.title for sh in self.open() if sh.cell(row=2, column=1).value]
+        with TemporaryDirectory() as spool_dir:
+            spools = [os.path.join(spool_dir, str(i)) for i, _ in enumerate(titles)]
+            with ProcessPoolExecutor(min(self.workers, len(titles) or 1)) as executor:
+                # Wait for all of the sheets, raising the error in a worker.
+                list(executor.map(read_sheet, [(self.excel_file, title, self.read_only,
+                    self.type_sample, self.HYPHEN, spool) for title, spool in zip(titles, spools)]))
+            yield from self.merge_rows([self.load_rows(spool) for spool in spools])
+        self.metrics.count('sheets', len(titles))
+
+
+    def load_rows(self, spool):
+        with open(spool, 'rb') as f:
+            while True:
+                try:
+                    yield from pickle.load(f)
+                except EOFError:
+                    break
+
+
+    def merge_rows(self, sheets):
+        """sheets: iterators of (serial number, indexes, items) of sheets
+           in order of serial numbers. Records end when all of them are 
+           exhausted, like read.
+        """
+        heads = [next(rows, None) for rows in sheets]
+        n_cells = 0
+        for i in itertools.count(1):
+            if all(head is None for head in heads):
+                break
+            dic = {}
+            for j, rows in enumerate(sheets):
+                if heads[j] is not None and heads[j][0] < i:
+                    raise SheetError(f'Rows of serial number {heads[j][0]} are left unread.')
+                while heads[j] is not None and heads[j][0] == i:
+                    _, idxes, items = heads[j]
+                    n_cells += len(items)
+                    for path, val in items:
+                        self.insert_path(dic, path, idxes, val)
+                    heads[j] = next(rows, None)
+            yield dic
+        self.metrics.count('records', i - 1)
+        self.metrics.count('cells', n_cells)
+
+
+    def output(self, records, indent, lines=False):
+        output_file = self.get_file_path(self.excel_file, '.jsonl' if lines else '.json')
+        json_file = JsonFile(output_file, backend=self.json_backend)
+        try:
+            with self.metrics.phase('write'):
+                json_file.output(records, indent)
+        except BaseException:
+            remove_output(output_file)
+            raise
+        if self.metrics.enabled:
+            self.metrics.count('input_bytes', path_size(self.excel_file))
+            self.metrics.count('output_bytes', os.path.getsize(output_file))
+        self.metrics.finish()
\ No newline at end of file
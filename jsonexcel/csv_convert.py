@@ -0,0 +1,265 @@
+from tempfile import TemporaryFile
+import csv
+import errno
+import glob
+import os
+import shutil
+
+from jsonexcel.convert import Engine, FromExcel, WritingSheet, ReadingSheet, \
+    register_engine, get_json_backend
+from jsonexcel.metrics import get_metrics
+from jsonexcel.progress import NULL_PROGRESS
+
+
+class CsvWorksheet:
+    """Substitute of xlsxwriter worksheet which writes rows to a CSV file.
+       Rows must be written in ascending order. They are written to a
+       temporary file first, because columns can be added to the header
+       row later, and copied after the header row when it is closed.
+       Strings which would be read as other types, like '12345', are
+       prefixed with an apostrophe like Excel, so that they are read
+       back as strings.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.header = []
+        self.data = TemporaryFile('w+', encoding='utf-8', newline='')
+        self.writer = csv.writer(self.data)
+        self.row = None
+        self.values = []
+        self.write_number = self.write_blank = self.write_boolean = self.write
+        self.write_url = self.write_string
+
+
+    def write(self, row, col, value):
+        if row == 0:
+            values = self.header
+        else:
+            if row != self.row:
+                self.flush()
+                self.row = row
+            values = self.values
+        if len(values) <= col:
+            values.extend([None] * (col + 1 - len(values)))
+        values[col] = value
+
+
+    def write_string(self, row, col, value):
+        if row and needs_prefix(value):
+            value = PREFIX + value
+        self.write(row, col, value)
+
+
+    def flush(self):
+        if self.values:
+            self.writer.writerow(self.values)
+            self.values = []
+
+
+    def close(self):
+        self.flush()
+        self.data.seek(0)
+        with open(self.path, 'w', encoding='utf-8', newline='') as f:
+            csv.writer(f).writerow(self.header)
+            shutil.copyfileobj(self.data, f)
+        self.data.close()
+
+
+class CsvWorkbook:
+    """Substitute of xlsxwriter Workbook which writes each worksheet
+       to a CSV file in a directory. File names have a serial number
+       to keep the order of sheets, like 001_main.csv.
+    """
+
+    def __init__(self, dirname):
+        self.dirname = dirname
+        self.worksheets = []
+
+
+    def __enter__(self):
+        os.makedirs(self.dirname, exist_ok=True)
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for worksheet in self.worksheets:
+            worksheet.close()
+
+
+    def add_worksheet(self, name):
+        path = os.path.join(self.dirname, f'{len(self.worksheets) + 1:03d}_{name}.csv')
+        worksheet = CsvWorksheet(path)
+        self.worksheets.append(worksheet)
+        return worksheet
+
+
+@register_engine
+class CsvEngine(Engine):
+    """Write sheets to CSV files in a directory instead of Excel file.
+       The layout of the sheets is the same as Excel. URLs are
+       written as strings, and strings looking like other types are
+       prefixed with an apostrophe. The directory can be read with FromCsv.
+    """
+
+    name = 'csv'
+    EXTENSION = ''
+
+    def open(self, filename):
+        return CsvWorkbook(filename)
+
+
+    def add_sheet(self, wb, sh_name, keys):
+        return WritingSheet(wb.add_worksheet(sh_name), keys, plain_text=True)
+
+
+class CsvSheet:
+    """Substitute of openpyxl worksheet to read a CSV file written by
+       CsvEngine. Each value is converted to bool, int or float if it is
+       written as one, and strings prefixed with an apostrophe are read
+       without it. The header row and column A are always str.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.title = os.path.splitext(os.path.basename(path))[0].split('_', 1)[1]
+        self.max_row = None
+
+
+    def iter_rows(self, min_row=1, max_row=None, min_col=1, max_col=None, values_only=True):
+        """Yield tuples of values like openpyxl. Rows are padded with None
+           to max_col. min_col must be 1 and values_only must be True.
+        """
+        with open(self.path, 'r', encoding='utf-8', newline='') as f:
+            for i, row in enumerate(csv.reader(f), 1):
+                if max_row is not None and i > max_row:
+                    break
+                if i < min_row:
+                    continue
+                if max_col is not None:
+                    row = row[:max_col] + [''] * (max_col - len(row))
+                if i == 1:
+                    yield tuple(val or None for val in row)
+                else:
+                    yield (row[0] or None,) + tuple(parse_value(val) for val in row[1:])
+
+
+class CsvReadingSheet(ReadingSheet):
+    """ReadingSheet for CsvSheet. Values are typed cell by cell, so
+       they are read as they are without data types of columns, and
+       the sheet is read only once.
+    """
+
+    def get_type(self):
+        return [None] * (self.max_col - 1)
+
+
+    def _read(self, values):
+        for val, path in zip(values, self.paths):
+            yield path, val
+
+
+def to_bool(val):
+    return val == 'True'
+
+
+def to_number(val):
+    """Return int if val has no decimal point or exponent, otherwise float.
+    """
+    try:
+        return int(val)
+    except ValueError:
+        return float(val)
+
+
+CONVERTERS = (to_bool, int, to_number)
+PREFIX = "'"
+
+
+def is_convertible(converter, val):
+    """Only values written by CsvEngine are accepted, so that strings
+       like '007' or 'nan' are not converted.
+    """
+    if converter is to_bool:
+        return val in ('True', 'False')
+    try:
+        return str(converter(val)) == val
+    except ValueError:
+        return False
+
+
+def needs_prefix(val):
+    """Return True if string val is written with PREFIX.
+    """
+    return val.startswith(PREFIX) or any(is_convertible(c, val) for c in CONVERTERS)
+
+
+def parse_value(val):
+    """Return a value written by CsvWorksheet. Empty string is None.
+    """
+    if not val:
+        return None
+    if val.startswith(PREFIX):
+        return val[len(PREFIX):]
+    for converter in CONVERTERS:
+        if is_convertible(converter, val):
+            return converter(val)
+    return val
+
+
+class CsvBook:
+    """Substitute of openpyxl workbook to iterate CsvSheet instances
+       in the order of file names.
+    """
+
+    def __init__(self, dirname):
+        self.dirname = dirname
+
+
+    def __iter__(self):
+        for path in sorted(glob.glob(os.path.join(self.dirname, '[0-9]*_*.csv'))):
+            yield CsvSheet(path)
+
+
+    def close(self):
+        pass
+
+
+class FromCsv(FromExcel):
+    """Read CSV files written by ToExcel with CsvEngine to output to json file.
+    """
+
+    def __init__(self, csv_dir, type_sample=None, json_backend=None, metrics=None,
+            progress=None):
+        """csv_dir: directory of CSV files.
+           type_sample: Not used, because values of CSV files are typed
+                        cell by cell. Accepted like FromExcel.
+           metrics: Metrics instance or True to collect metrics like FromExcel.
+           progress: Progress instance like FromExcel. total is not
+                     reported.
+        """
+        csv_dir = os.path.abspath(csv_dir)
+        if not os.path.isdir(csv_dir):
+            raise FileNotFoundError(
+                errno.ENOENT, os.strerror(errno.ENOENT), csv_dir)
+        self.excel_file = csv_dir
+        self.read_only = True
+        self.type_sample = type_sample
+        self.json_backend = get_json_backend(json_backend, encode=True)
+        self.wb = CsvBook(csv_dir)
+        self.sheets = None
+        self.workers = None
+        self.metrics = get_metrics(metrics)
+        self.progress = progress or NULL_PROGRESS
+
+
+    def set_sheets(self):
+        """Sheets without rows are skipped like FromExcel.
+        """
+        if self.sheets is None:
+            self.sheets = tuple(CsvReadingSheet(sh) for sh \
+                in self.open() if next(sh.iter_rows(min_row=2, max_row=2), (None,))[0])
+
+
+    def load_workbook(self):
+        return CsvBook(self.excel_file)
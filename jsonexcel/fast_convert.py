@@ -1,57 +1,57 @@
-from pyexcelerate import Workbook
-from jsonexcel import ToExcel, WritingSheet
+from contextlib import contextmanager
 
+from pyexcelerate import Workbook, Style
+from pyexcelerate.DataTypes import DataTypes
+from jsonexcel import ToExcel, WritingSheet, Engine, register_engine
 
-class FastWritingSheet(WritingSheet):
 
-    
-    def set_keys(self, keys):
-        self.keys = {}
-        for col, key in enumerate(keys, 2):
-            self.keys[key] = col
-            self.write(1, col, key)
+# pyexcelerate writes strings starting with '=' as formulas unless 
+# the data type of the cell is specified.
+TEXT = Style(data_type=DataTypes.INLINE_STRING)
+
 
+class FastWritingSheet(WritingSheet):
+    """Row and column numbers of pyexcelerate start from 1.
+       URLs are written as strings, because pyexcelerate 
+       does not support hyperlinks. Strings starting with '=' are
+       written as strings like xlsxwriter's write_string.
+    """
 
     def write(self, row, col, value, index=''):
         if index:
-            self.sheet.set_cell_value(row, 1, index)
+            self.sheet.set_cell_value(row + 1, 1, index)
         if not col:
             return
         if isinstance(value, list) or value is None:
-            self.sheet.set_cell_value(row, col, None)
+            self.sheet.set_cell_value(row + 1, col + 1, None)
         else:
-            self.sheet.set_cell_value(row, col, value)
-        
+            self.sheet.set_cell_value(row + 1, col + 1, value)
+            if isinstance(value, str) and value.startswith('='):
+                self.sheet.set_cell_style(row + 1, col + 1, TEXT)
 
-class FastToExcel(ToExcel):
 
+@register_engine
+class PyExcelerateEngine(Engine):
+    """Write Excel file with pyexcelerate. All of the cells are
+       kept in memory until the file is saved.
+    """
+
+    name = 'pyexcelerate'
 
-    def set_sheets(self, wb):
-        """Create dict {sh_name: WritingSheet instance}
-           If a key is equal to sh_name directory connected to HYPHEN,
-           the key is empty object list.
-        """
-        self.sheets = {}
-        # Change sh_name if key is sh_name connected to directory HYPHEN 
-        for sh_name in set(self.sheet_format.values()):
-            for key in self.sheet_format.keys():
-                if key == f'{sh_name}-0':
-                    self.sheet_format[key] = sh_name
-        for sh_name in self.sheet_format.values():
-            if sh_name not in self.sheets:
-                self.sheets[sh_name] = FastWritingSheet(
-                    wb.new_sheet(sh_name),
-                    sorted(key for key, val in self.sheet_format.items() \
-                        if val == sh_name and key != f'{sh_name}-0'),
-                    row=1
-                )
-
-
-    def output(self, records):
-        excel_file = self.get_file_path(self.json.file, '.xlsx')
+    @contextmanager
+    def open(self, filename):
         wb = Workbook()
-        self.set_sheets(wb)
-        for record in records:
-            for cell in record:
-                self.write(cell)
-        wb.save(excel_file)
+        yield wb
+        wb.save(filename)
+
+
+    def add_sheet(self, wb, sh_name, keys):
+        return FastWritingSheet(wb.new_sheet(sh_name), keys)
+        
+
+class FastToExcel(ToExcel):
+    """ToExcel using pyexcelerate engine by default.
+    """
+
+    def __init__(self, json_file, engine='pyexcelerate', **options):
+        super().__init__(json_file, engine=engine, **options)
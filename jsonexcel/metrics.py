@@ -0,0 +1,132 @@
+from collections import defaultdict
+from contextlib import nullcontext
+import os
+import time
+
+
+class Metrics:
+    """Collect seconds spent in phases and counters of conversions.
+       Phases can be nested, and the seconds of a phase do not include
+       the seconds of the phases inside it. Values are accumulated over
+       conversions until reset is called.
+    """
+
+    enabled = True
+
+    def __init__(self, observer=None):
+        """observer: function called with this instance when a conversion
+                     is finished, to export the metrics.
+        """
+        self.observer = observer
+        self.reset()
+
+
+    def reset(self):
+        self.seconds = defaultdict(float)
+        self.counters = defaultdict(int)
+        self.stack = []
+        self.mark = None
+
+
+    def enter(self, name):
+        now = time.perf_counter()
+        if self.stack:
+            self.seconds[self.stack[-1]] += now - self.mark
+        self.stack.append(name)
+        self.mark = now
+
+
+    def exit(self):
+        now = time.perf_counter()
+        self.seconds[self.stack.pop()] += now - self.mark
+        self.mark = now
+
+
+    def phase(self, name):
+        return Phase(self, name)
+
+
+    def iterate(self, name, iterable):
+        """Yield items of iterable, counting the time to get them as name.
+        """
+        it = iter(iterable)
+        while True:
+            self.enter(name)
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            finally:
+                self.exit()
+            yield item
+
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+
+    def finish(self):
+        if self.observer is not None:
+            self.observer(self)
+
+
+    def as_dict(self):
+        return {'seconds': dict(self.seconds), 'counters': dict(self.counters)}
+
+
+class Phase:
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+
+    def __enter__(self):
+        self.metrics.enter(self.name)
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics.exit()
+
+
+class NullMetrics:
+    """Used when metrics are not collected, doing nothing.
+    """
+
+    enabled = False
+
+    def phase(self, name):
+        return NULL_PHASE
+
+
+    def iterate(self, name, iterable):
+        return iterable
+
+
+    def count(self, name, n=1):
+        pass
+
+
+    def finish(self):
+        pass
+
+
+NULL_PHASE = nullcontext()
+NULL_METRICS = NullMetrics()
+
+
+def get_metrics(metrics):
+    """Return Metrics instance for True, NULL_METRICS for None or False,
+       or metrics itself.
+    """
+    if metrics is True:
+        return Metrics()
+    return metrics or NULL_METRICS
+
+
+def path_size(path):
+    """Return the size of a file, or the total size of files in a directory.
+    """
+    if os.path.isdir(path):
+        return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+    return os.path.getsize(path)
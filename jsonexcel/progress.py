@@ -0,0 +1,97 @@
+class Cancelled(Exception):
+    """Raised in a conversion cancelled with Progress.cancel.
+    """
+    pass
+
+
+class Progress:
+    """Report progress of conversions to callback, and work as a cancel token.
+       Conversions read records in passes: ToExcel has 'schema' pass to find
+       columns and 'convert' pass, and FromExcel has 'types' pass for each
+       sheet to find data types of columns in read-only mode and 'convert'
+       pass. done and total are bytes of JSON file for ToExcel, rows of the
+       sheet for 'types' pass and records for 'convert' pass of FromExcel.
+       total is None if it is unknown.
+       cancel can be called from another thread. The conversion raises
+       Cancelled when it reads the next record.
+    """
+
+    enabled = True
+
+    def __init__(self, callback=None, interval=1000):
+        """callback: function called with this instance at the start
+                     and the end of each pass and every interval records.
+                     It is called in the thread running the conversion.
+        """
+        self.callback = callback
+        self.interval = interval
+        self.cancelled = False
+        self.phase = None
+        self.records = 0
+        self.done = 0
+        self.total = None
+
+
+    @property
+    def fraction(self):
+        """Return the ratio of done to total, or None if total is unknown.
+        """
+        if self.total:
+            return min(self.done / self.total, 1.0)
+        return None
+
+
+    def cancel(self):
+        self.cancelled = True
+
+
+    def check(self):
+        if self.cancelled:
+            raise Cancelled('The conversion was cancelled.')
+
+
+    def iterate(self, phase, items, position=None, total=None):
+        """Yield items, updating progress of phase.
+           position: function returning done. If None, done is the number
+                     of items.
+        """
+        self.phase = phase
+        self.records = self.done = 0
+        self.total = total
+        self.report()
+        i = 0
+        for i, item in enumerate(items, 1):
+            self.check()
+            if i % self.interval == 0:
+                self.update(i, position)
+            yield item
+        self.update(i, position)
+
+
+    def update(self, records, position):
+        self.records = records
+        self.done = position() if position else records
+        self.report()
+
+
+    def report(self):
+        if self.callback is not None:
+            self.callback(self)
+
+
+class NullProgress:
+    """Used when progress is not reported, doing nothing.
+    """
+
+    enabled = False
+    cancelled = False
+
+    def iterate(self, phase, items, position=None, total=None):
+        return items
+
+
+    def check(self):
+        pass
+
+
+NULL_PROGRESS = NullProgress()
@@ -0,0 +1,132 @@
+import glob
+import hashlib
+import json
+import os
+import time
+
+
+class SchemaCache:
+    """Store sheet_format of JSON files in a cache directory, so that
+       the schema inference pass can be skipped if the file is unchanged.
+       An entry is keyed by the file path and is valid while the size and
+       mtime of the file are the same. The file is not read to find it, 
+       except when it was modified less than RACY_SECONDS before the entry
+       was stored: it may be modified again without changing mtime on file
+       systems with coarse timestamps, so the content hash is stored and
+       checked until the entry is found later than that.
+    """
+
+    CHUNK_SIZE = 1024 * 1024
+    RACY_SECONDS = 2
+
+    def __init__(self, directory=None, max_size=1024 * 1024 * 32):
+        if directory is None:
+            directory = os.environ.get('JSONEXCEL_CACHE_DIR') or \
+                os.path.join(os.path.expanduser('~'), '.cache', 'jsonexcel')
+        self.directory = directory
+        self.max_size = max_size
+
+
+    def entry_path(self, path, variant):
+        """variant: str to separate entries of the same file converted
+           with different settings. 
+        """
+        key = f'{os.path.abspath(path)}\n{variant}'.encode('utf-8')
+        return os.path.join(self.directory, f'{hashlib.sha1(key).hexdigest()}.json')
+
+
+    def file_hash(self, path):
+        hash_obj = hashlib.blake2b()
+        with open(path, 'rb') as f:
+            while chunk := f.read(self.CHUNK_SIZE):
+                hash_obj.update(chunk)
+        return hash_obj.hexdigest()
+
+
+    def get(self, path, variant=''):
+        """Return cached sheet_format, or None if there is no valid entry.
+        """
+        entry_path = self.entry_path(path, variant)
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            stat = os.stat(path)
+            if entry['size'] != stat.st_size or entry['mtime'] != stat.st_mtime_ns:
+                return self.invalidate(path, variant)
+            if entry['hash'] is not None:
+                if entry['hash'] != self.file_hash(path):
+                    return self.invalidate(path, variant)
+                if not self.is_racy(stat):
+                    entry['hash'] = None
+                    self.write(entry_path, entry)
+            # mtime of entries is used to evict the least recently used ones.
+            os.utime(entry_path)
+        except (OSError, ValueError, KeyError):
+            return None
+        return entry['sheet_format']
+
+
+    def set(self, path, sheet_format, variant=''):
+        stat = os.stat(path)
+        entry = dict(
+            path=os.path.abspath(path),
+            size=stat.st_size,
+            mtime=stat.st_mtime_ns,
+            hash=self.file_hash(path) if self.is_racy(stat) else None,
+            sheet_format=sheet_format
+        )
+        os.makedirs(self.directory, exist_ok=True)
+        self.write(self.entry_path(path, variant), entry)
+        self.evict()
+
+
+    def is_racy(self, stat):
+        return time.time_ns() - stat.st_mtime_ns < self.RACY_SECONDS * 10 ** 9
+
+
+    def write(self, entry_path, entry):
+        temp_path = f'{entry_path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(temp_path, entry_path)
+
+
+    def invalidate(self, path, variant=''):
+        try:
+            os.remove(self.entry_path(path, variant))
+        except FileNotFoundError:
+            pass
+
+
+    def entries(self):
+        """Return a list of (mtime, size, entry path), oldest first.
+        """
+        entries = []
+        for entry_path in glob.glob(os.path.join(self.directory, '*.json')):
+            try:
+                stat = os.stat(entry_path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+        return sorted(entries)
+
+
+    def evict(self):
+        """Remove the least recently used entries until the total size
+           of the cache directory is within max_size. 
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_path in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(entry_path)
+            except OSError:
+                continue
+            total -= size
+
+
+    def clear(self):
+        for _, _, entry_path in self.entries():
+            os.remove(entry_path)
@@ -16,5 +16,8 @@ setup(
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    python_requires='>=3.8'
+    python_requires='>=3.8',
+    entry_points={
+        'console_scripts': ['jsonexcel=jsonexcel.cli:main'],
+    },
 )
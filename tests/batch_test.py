@@ -0,0 +1,111 @@
+import io
+import json
+import os
+from contextlib import redirect_stdout, redirect_stderr
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main, mock
+
+from jsonexcel.batch import convert_files, get_tasks, Task, TO_EXCEL, FROM_EXCEL
+from jsonexcel.cli import main as cli_main
+
+
+class BatchTestCase(TestCase):
+
+    def setUp(self):
+        self.test_dir = TemporaryDirectory()
+        self.dir_path = self.test_dir.name
+        with open(self.path('a.json'), 'w', encoding='utf-8') as f:
+            json.dump(records, f)
+        with open(self.path('b.jsonl'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(json.dumps(record) for record in records))
+        with open(self.path('broken.json'), 'w', encoding='utf-8') as f:
+            f.write('[{"a": 1},')
+        with open(self.path('note.txt'), 'w', encoding='utf-8') as f:
+            f.write('not converted')
+
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+
+    def path(self, name):
+        return os.path.join(self.dir_path, name)
+
+
+    def convert(self, **options):
+        options.setdefault('to_excel', {'schema_cache': False})
+        results = convert_files([self.dir_path], workers=1, **options)
+        return {os.path.basename(result.source): result for result in results}
+
+
+    def test_get_tasks(self):
+        paths = [self.path(name) for name in ('a.json', 'a_20201203123456.xlsx',
+            'a_20201203123456_20201204000000.json', 'c_20201203123456.xlsx')]
+        self.assertEqual([Task(paths[0], TO_EXCEL), Task(paths[3], FROM_EXCEL)], get_tasks(paths))
+        self.assertEqual([Task(paths[1], FROM_EXCEL), Task(paths[3], FROM_EXCEL)],
+            get_tasks(paths, FROM_EXCEL))
+
+
+    def test_convert_files(self):
+        results = self.convert()
+        self.assertEqual(['a.json', 'b.jsonl', 'broken.json'], sorted(results))
+        self.assertEqual('failed', results['broken.json'].status)
+        self.assertIsNotNone(results['broken.json'].error)
+        for name in ('a.json', 'b.jsonl'):
+            with self.subTest(name):
+                self.assertEqual('converted', results[name].status)
+                self.assertTrue(os.path.isfile(results[name].output))
+                self.assertGreater(results[name].throughput, 0)
+
+        # Outputs of a.json and b.jsonl are up to date and not converted again.
+        results = self.convert()
+        self.assertEqual(['a.json', 'b.jsonl', 'broken.json'], sorted(results))
+        self.assertEqual(['skipped', 'skipped', 'failed'],
+            [results[name].status for name in ('a.json', 'b.jsonl', 'broken.json')])
+        # Forced outputs replace these, leaving one Excel file for each source.
+        for name in ('a.json', 'b.jsonl'):
+            os.remove(results[name].output)
+        self.assertEqual(['converted', 'converted', 'failed'],
+            [result.status for _, result in sorted(self.convert(force=True).items())])
+
+        results = self.convert(direction=FROM_EXCEL, from_excel={'lines': True})
+        self.assertEqual(2, len(results))
+        for result in results.values():
+            with self.subTest(result.source):
+                self.assertEqual('converted', result.status)
+                with open(result.output, 'r', encoding='utf-8') as f:
+                    self.assertEqual(records, [json.loads(line) for line in f])
+
+
+    def test_failed_output(self):
+        # The third record has a column not found in the sample.
+        with open(self.path('late.json'), 'w', encoding='utf-8') as f:
+            json.dump(records + [{'id': 3, 'extra': 'z'}], f)
+        for _ in range(2):
+            results = self.convert(to_excel={'schema_cache': False, 'sample': 1,
+                'late_columns': 'error'})
+            self.assertEqual('failed', results['late.json'].status)
+            self.assertIsNone(results['late.json'].output)
+            self.assertEqual([], [name for name in os.listdir(self.dir_path)
+                if name.startswith('late_')])
+
+
+    def test_cli(self):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(stderr), \
+                mock.patch.dict(os.environ, JSONEXCEL_CACHE_DIR=self.path('cache')):
+            self.assertEqual(1, cli_main([os.path.join(self.dir_path, '*.json*'), '-w', '1']))
+            self.assertEqual(0, cli_main([self.path('a.json'), '-w', '1']))
+        self.assertIn('broken.json', stderr.getvalue())
+        self.assertEqual(['2 converted, 0 skipped, 1 failed', '0 converted, 1 skipped, 0 failed'],
+            [line for line in stdout.getvalue().splitlines() if line[0].isdigit()])
+
+
+records = [
+    {'id': 1, 'name': 'x', 'tags': [{'t': 'a'}, {'t': 'b'}]},
+    {'id': 2, 'name': 'y', 'tags': [{'t': 'c'}]},
+]
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+import csv
+import glob
+import json
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from jsonexcel import ToExcel, FromExcel, FromCsv
+
+
+class CsvEngineTestCase(TestCase):
+
+    def setUp(self):
+        self.test_dir = TemporaryDirectory()
+
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+
+    def convert(self, name, data=None, **options):
+        """Return the path of Excel file or CSV directory.
+        """
+        dir_path = os.path.join(self.test_dir.name, name)
+        os.mkdir(dir_path)
+        json_file = os.path.join(dir_path, 'records.json')
+        with open(json_file, 'w', encoding='utf-8') as f:
+            json.dump(records if data is None else data, f, ensure_ascii=False)
+        ToExcel(json_file, schema_cache=False, **options).convert()
+        output, = glob.glob(os.path.join(dir_path, 'records_*'))
+        return output
+
+
+    def read(self, from_excel):
+        from_excel.convert()
+        json_file, = glob.glob(os.path.join(os.path.dirname(from_excel.excel_file), 'records_*.json'))
+        with open(json_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+
+    def test_files(self):
+        csv_dir = self.convert('csv', engine='csv')
+        self.assertEqual(['001_main.csv', '002_c.csv', '003_c.g.csv'], sorted(os.listdir(csv_dir)))
+        with open(os.path.join(csv_dir, '001_main.csv'), 'r', encoding='utf-8', newline='') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(['', 'a', 'b', 'd-0', 'd-1', 'e'], rows[0])
+        self.assertEqual(['1', '1', 'x\r\ny'], rows[1])
+        self.assertEqual(['4', '4', 'z', 'False', '2.5', 'x,"y"'], rows[4])
+
+
+    def test_round_trip(self):
+        expected = self.read(FromExcel(self.convert('xlsx')))
+        for name, options in (('csv', {}), ('csv_sample', {'sample': 1})):
+            csv_dir = self.convert(name, engine='csv', **options)
+            with self.subTest(name):
+                self.assertEqual(expected, self.read(FromCsv(csv_dir)))
+                self.assertEqual(expected, self.read(FromCsv(csv_dir, type_sample=1)))
+        result = self.read(FromCsv(csv_dir))
+        self.assertEqual('007', result[2]['e'])
+        self.assertEqual(1.5, result[0]['c'][0]['f'])
+
+
+    def test_types(self):
+        csv_dir = self.convert('types', typed_records, engine='csv')
+        with open(os.path.join(csv_dir, '001_main.csv'), 'r', encoding='utf-8', newline='') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(['1', "'12345", '1', "'True", "''x", '2.5'], rows[1])
+        self.assertEqual(typed_records, self.read(FromCsv(csv_dir)))
+
+
+records = [
+    {'a': 1, 'b': 'x\r\ny', 'c': [{'f': 1.5, 'g': [{'h': 'あ'}, {'h': 'い'}]}, {'f': 2, 'g': [{'h': 'う'}]}]},
+    {'a': 2, 'b': 'https://example.com', 'c': [{'f': 3, 'g': [{'h': 'え'}]}]},
+    {'a': 3, 'b': None, 'd': [True, 1], 'e': '007'},
+    {'a': 4, 'b': 'z', 'd': [False, 2.5], 'e': 'x,"y"'},
+]
+
+typed_records = [
+    {'a': '12345', 'b': 1, 'c': 'True', 'd': "'x", 'e': 2.5},
+    {'a': '00123', 'b': '2', 'c': True, 'd': 'y', 'e': '2.5'},
+    {'a': '-1', 'b': 3.0, 'c': 'False', 'd': 'z', 'e': 'nan'},
+]
+
+
+if __name__ == '__main__':
+    main()
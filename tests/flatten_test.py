@@ -0,0 +1,104 @@
+import json
+from unittest import TestCase, main
+
+from jsonexcel import Convert, FlattenPlans, FlattenWorker, Cells, select_keys
+
+
+class Flattener(Convert):
+
+    def __init__(self, **kwargs):
+        self.plans = FlattenPlans(**kwargs)
+
+
+class FlattenTestCase(TestCase):
+
+    def test_flatten(self):
+        flattener = Flattener()
+        for i, dic in enumerate(dics * 2, 1):
+            with self.subTest(dic):
+                expected = list(flattener.serialize(dic, str(i)))
+                self.assertEqual(expected, list(flattener.flatten(dic, str(i))))
+        self.assertEqual(len(dics), flattener.plans.misses)
+        self.assertEqual(len(dics), flattener.plans.hits)
+
+
+    def test_cells(self):
+        flattener = Flattener()
+        cells = flattener.flatten(dics[4], 12)
+        self.assertIsInstance(cells, Cells)
+        self.assertEqual([(12, 0), (12, 0, 0), (12, 1)], cells.idxes)
+        self.assertEqual(list(flattener.serialize(dics[4], '12')), list(cells))
+        self.assertEqual(['c.f', '12-0', 5], list(next(iter(cells))))
+        self.assertEqual(len(list(cells)), len(cells))
+        # Keys are shared by records of the same shape.
+        other = flattener.flatten(dics[4], 13)
+        self.assertIs(cells.plan.keys, other.plan.keys)
+
+
+    def test_serialize_selected(self):
+        flattener = Flattener()
+        selections = [('a',), ('c.b.x', 'd-1'), ('e.h-1', 'f'), ('b-0-0', 'b-1-1.c'), 
+            ('d-0.h', 'd-1.i-0'), ('c.f', 'c.g.i.k', 'c.g-0'), ('a-0', 'c')]
+        for keys in selections:
+            selection = select_keys(keys)
+            for dic in dics:
+                with self.subTest(keys=keys, dic=dic):
+                    expected = [item for item in flattener.serialize(dic, '1') if item[0] in keys]
+                    self.assertEqual(expected, list(flattener.serialize_selected(dic, '1', selection)))
+        self.assertEqual({'c': False, 'c.g': False, 'c.g.i': True, 'd': False, 'd-0': True}, 
+            select_keys(['c.g.i', 'd-0']))
+
+
+    def test_lru(self):
+        flattener = Flattener(maxsize=2)
+        for dic in dics[:3]:
+            list(flattener.flatten(dic, '1'))
+        self.assertEqual(2, len(flattener.plans.plans))
+        self.assertIsNone(flattener.plans.get(flattener.shape(dics[0], [].append)))
+
+
+    def test_not_effective(self):
+        flattener = Flattener(min_lookups=4)
+        for i in range(4):
+            list(flattener.flatten({f'a{i}': i}, '1'))
+        self.assertFalse(flattener.plans.effective)
+        self.assertEqual([('b', '1', 1)], list(flattener.flatten({'b': 1}, '1')))
+        self.assertEqual(4, flattener.plans.misses)
+
+
+    def test_worker(self):
+        worker = FlattenWorker('records.jsonl', {}, 'json', columns=True)
+        worker.plans = FlattenPlans(maxsize=2)
+        flattener = Flattener()
+        for selection in (None, select_keys(['a', 'c.g.i.k', 'e.h-1'])):
+            _, new_plans, dropped, records = worker.flatten_records(
+                [json.dumps(dic) for dic in dics * 2], selection)
+            plans = {}
+            for i, (dic, (ref, values)) in enumerate(zip(dics * 2, records), 1):
+                with self.subTest(selection=selection, dic=dic):
+                    if type(ref) is int:
+                        plans[ref] = new_plans[ref]
+                    plan, columns = plans[ref] if type(ref) is int else ref
+                    expected = flattener.serialize(dic, str(i)) if selection is None \
+                        else flattener.serialize_selected(dic, str(i), selection)
+                    self.assertEqual(list(expected), list(Cells(plan, i, values)))
+                    self.assertEqual(list(flattener.parse_json(dic, 'main')), list(columns))
+            if selection is None:
+                # Plans dropped from the cache are compiled again with new ids.
+                self.assertEqual(len(dics) * 2, len(new_plans))
+                self.assertEqual(len(dics) * 2 - 2, len(dropped))
+            else:
+                self.assertEqual({}, new_plans)
+
+
+dics = [
+    {'a': 1, 'c': {'a': 2, 'b': {'x': 5, 'y': None}}, 'd': [1, 2, 3]},
+    {'e': [{'h': [89, 56]}, {'h': [70, 56]}], 'f': {}},
+    {'a': [], 'b': [[], [1, [2, {'c': 3}]]]},
+    {'d': [[{'h': 5, 'i': 10}, {'h': 50, 'i': True}], [{'h': 'x', 'i': []}]]},
+    {'c': [{'f': 5, 'g': [{'h': 100, 'i': {'j': 15, 'k':16}}]}, {'f': 7, 'g': [{}]}]},
+]
+
+
+if __name__ == '__main__':
+    main()
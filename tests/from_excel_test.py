@@ -0,0 +1,148 @@
+import glob
+import json
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+import openpyxl
+
+from jsonexcel import ToExcel, FromExcel, SheetError
+
+
+class FromExcelOptionTestCase(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_dir = TemporaryDirectory()
+        cls.excel_file = cls.make_workbook('records', records)
+
+
+    @classmethod
+    def make_workbook(cls, name, records):
+        dir_path = os.path.join(cls.test_dir.name, name)
+        os.mkdir(dir_path)
+        json_file = os.path.join(dir_path, 'records.json')
+        with open(json_file, 'w', encoding='utf-8') as f:
+            json.dump(records, f, ensure_ascii=False)
+        ToExcel(json_file, schema_cache=False).convert()
+        excel_file, = glob.glob(os.path.join(dir_path, '*.xlsx'))
+        return excel_file
+
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.test_dir.cleanup()
+
+
+    def convert(self, name, indent=None, excel_file=None, lines=False, **options):
+        dir_path = os.path.join(self.test_dir.name, name)
+        os.mkdir(dir_path)
+        from_excel = FromExcel(excel_file or self.excel_file, **options)
+        from_excel.get_file_path = lambda path, ext: os.path.join(dir_path, f'records{ext}')
+        from_excel.convert(indent=indent, lines=lines)
+        from_excel.close()
+        ext = '.jsonl' if lines else '.json'
+        with open(os.path.join(dir_path, f'records{ext}'), 'r', encoding='utf-8') as f:
+            return f.read()
+
+
+    def test_read_only(self):
+        expected = self.convert('not_read_only', read_only=False)
+        self.assertEqual(expected, self.convert('read_only'))
+        result = json.loads(expected)
+        # Records after the end of child sheets are read.
+        self.assertEqual([1, 2, 3, 4], [record['a'] for record in result])
+        self.assertEqual('x\r\ny', result[0]['b'])
+
+
+    def test_close(self):
+        dir_path = os.path.join(self.test_dir.name, 'close')
+        os.mkdir(dir_path)
+        with FromExcel(self.excel_file) as from_excel:
+            from_excel.get_file_path = lambda path, ext: os.path.join(dir_path, f'records{ext}')
+            wb = from_excel.wb
+            from_excel.convert()
+            # The file is released after convert, and opened again when needed.
+            self.assertIsNone(from_excel.wb)
+            self.assertIsNone(wb._archive.fp)
+            from_excel.set_sheets()
+            self.assertIsNotNone(from_excel.wb)
+            from_excel.convert()
+        self.assertIsNone(from_excel.wb)
+        with open(os.path.join(dir_path, 'records.json'), 'r', encoding='utf-8') as f:
+            self.assertEqual(4, len(json.load(f)))
+
+
+    def test_unsorted_sheet(self):
+        dir_path = os.path.join(self.test_dir.name, 'unsorted')
+        os.mkdir(dir_path)
+        wb = openpyxl.load_workbook(self.excel_file)
+        # Child rows sorted by the value column in descending order.
+        rows = [[cell.value for cell in row] for row in wb['c'].iter_rows(min_row=2)]
+        for row, values in enumerate(reversed(rows), 2):
+            for col, value in enumerate(values, 1):
+                wb['c'].cell(row=row, column=col, value=value)
+        excel_file = os.path.join(dir_path, 'unsorted.xlsx')
+        wb.save(excel_file)
+        for i, options in enumerate(({}, {'read_only': False}, {'workers': 2})):
+            with self.subTest(**options):
+                with self.assertRaisesRegex(SheetError, 'not in order'):
+                    self.convert(f'unsorted_{i}', excel_file=excel_file, **options)
+
+
+    def test_json_lines(self):
+        expected = json.loads(self.convert('json'))
+        result = self.convert('jsonl', indent=2, lines=True)
+        self.assertEqual(len(expected), result.count('\n'))
+        self.assertEqual(expected, [json.loads(line) for line in result.splitlines()])
+
+
+    def test_workers(self):
+        expected = self.convert('serial')
+        self.assertEqual(expected, self.convert('workers', workers=2))
+        self.assertEqual(expected, self.convert('workers_sample', workers=3, type_sample=1))
+        self.assertEqual(self.convert('serial_not_read_only', read_only=False), 
+            self.convert('workers_not_read_only', workers=2, read_only=False))
+
+
+    def test_type_sample(self):
+        expected = self.convert('full_scan')
+        for type_sample in (0, 1, 100):
+            with self.subTest(type_sample):
+                self.assertEqual(expected, self.convert(f'sample{type_sample}', type_sample=type_sample))
+
+
+    def test_type_promotion(self):
+        excel_file = self.make_workbook('numbers', [{'a': 0.0, 'b': 1}, {'a': 1, 'b': 2.5}, {'a': 1.5, 'b': 3}])
+        result = json.loads(self.convert('numbers_full_scan', excel_file=excel_file))
+        self.assertEqual([0.0, 1.0, 1.5], [record['a'] for record in result])
+        self.assertEqual([1.0, 2.5, 3.0], [record['b'] for record in result])
+        result = json.loads(self.convert('numbers_sample', excel_file=excel_file, type_sample=0))
+        # 0.0 is entered into cell as 0. 
+        self.assertEqual([0, 1, 1.5], [record['a'] for record in result])
+        self.assertEqual([1, 2.5, 3.0], [record['b'] for record in result])
+        self.assertIs(int, type(result[0]['b']))
+        self.assertIs(float, type(result[2]['b']))
+
+
+    def test_type_mismatch(self):
+        excel_file = self.make_workbook('mismatch', [{'a': 1}, {'a': 'x'}, {'a': True}, {'a': 2.5}])
+        result = json.loads(self.convert('mismatch_sample', excel_file=excel_file, type_sample=1))
+        # Values of other types than int found in the sample are not converted.
+        self.assertEqual([1, 'x', True, 2.5], [record['a'] for record in result])
+        self.assertIs(bool, type(result[2]['a']))
+        # The full scan finds str column.
+        result = json.loads(self.convert('mismatch_full_scan', excel_file=excel_file))
+        self.assertEqual(['1', 'x', 'True', '2.5'], [record['a'] for record in result])
+
+
+records = [
+    {'a': 1, 'b': 'x\r\ny', 'c': [{'f': 1.5, 'g': [{'h': 'あ'}, {'h': 'い'}]}, {'f': 2, 'g': [{'h': 'う'}]}]},
+    {'a': 2, 'b': 'https://example.com', 'c': [{'f': 3, 'g': [{'h': 'え'}]}]},
+    {'a': 3, 'b': None, 'd': [True, False]},
+    {'a': 4, 'b': 'z', 'd': [False, True]},
+]
+
+
+if __name__ == '__main__':
+    main()
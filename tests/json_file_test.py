@@ -0,0 +1,135 @@
+import json
+import os
+from datetime import datetime
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from jsonexcel import JsonFile, JSON_BACKENDS, get_json_backend
+from jsonexcel.convert import orjson
+
+
+class JsonStreamTestCase(TestCase):
+
+    def setUp(self):
+        self.test_dir = TemporaryDirectory()
+        self.json_file = os.path.join(self.test_dir.name, 'test.json')
+
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+
+    def write(self, text):
+        with open(self.json_file, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+    def read(self, chunk_size, backend=None):
+        json_file = JsonFile(self.json_file, backend=backend)
+        json_file.CHUNK_SIZE = chunk_size
+        return list(json_file)
+
+
+    def test_streaming(self):
+        for text in texts + [special_text]:
+            self.write(text)
+            expected = json.loads(text)
+            for backend in backends:
+                for chunk_size in (1, 3, 7, 1024):
+                    with self.subTest(text=text, backend=backend.name, chunk_size=chunk_size):
+                        # repr to compare types of numbers
+                        self.assertEqual(repr(expected), repr(self.read(chunk_size, backend)))
+
+
+    def test_not_streaming(self):
+        self.write(texts[1])
+        json_file = JsonFile(self.json_file, streaming=False)
+        self.assertEqual(json.loads(texts[1]), list(json_file))
+
+
+    def test_output(self):
+        records = [json.loads(text) for text in texts]
+        records.append({'a': 'x\ny', 'b': {'c': [], 'd': {}}})
+        for backend in backends:
+            # orjson has no spaces after separators without indent.
+            separators = (backend.separator, ': ') if backend.separator == ', ' else (',', ':')
+            for indent in (None, 0, 2, 4, '\t'):
+                for records_ in ([], records[1], records):
+                    JsonFile(self.json_file, backend=backend).output(iter(records_), indent)
+                    with open(self.json_file, 'r', encoding='utf-8') as f:
+                        result = f.read()
+                    expected = json.dumps(records_, ensure_ascii=False, indent=indent, 
+                        separators=separators if indent is None else None)
+                    with self.subTest(backend=backend.name, indent=indent, records=records_):
+                        self.assertEqual(expected, result)
+
+
+    def test_backend(self):
+        text = '[{"a": 18446744073709551616, "b": NaN, "c": "\\u3042\\n"}]'
+        self.write(text)
+        for backend in backends:
+            with self.subTest(backend.name):
+                json_file = JsonFile(self.json_file, streaming=False, backend=backend)
+                records = list(json_file)
+                self.assertEqual(2 ** 64, records[0]['a'])
+                self.assertEqual('あ\n', records[0]['c'])
+                # Integers over 64 bits are encoded with the json module.
+                self.assertEqual(2 ** 64, json.loads(backend.dumps(records[0]))['a'])
+                for indent in (None, 2, 4):
+                    # NaN and Infinity are encoded like the json module, and
+                    # datetime is not encoded.
+                    for value in (float('nan'), [1, {'b': float('-inf')}]):
+                        self.assertEqual(json.dumps({'x': value}, indent=indent),
+                            backend.dumps({'x': value}, indent))
+                    with self.assertRaises(TypeError):
+                        backend.dumps({'x': datetime(2020, 1, 2)}, indent)
+        self.assertEqual('json', get_json_backend(encode=True).name)
+        with self.assertRaises(ValueError):
+            get_json_backend('simplejson')
+
+
+    def test_lines(self):
+        records = [json.loads(text) for text in texts]
+        for ext in ('.jsonl', '.ndjson'):
+            json_file = JsonFile(self.json_file.replace('.json', ext))
+            json_file.output(iter(records), indent=2)
+            with open(json_file.file, 'a', encoding='utf-8') as f:
+                f.write('\n  \n')
+            with self.subTest(ext=ext):
+                self.assertEqual(records, list(json_file))
+                for parts in (1, 2, 3, 100):
+                    lines = [line for start, end in json_file.split(parts) \
+                        for line in json_file.iter_lines(start, end)]
+                    self.assertEqual(records, [json.loads(line) for line in lines])
+
+
+    def test_invalid(self):
+        for text in ('{"a": 1}', '[{"a": 1} {"a": 2}]', '[{"a": 1},', '[12',
+                '[1]garbage', '[] []', '[{"a": 1}] ,', '[{"a": 1}, {"a": 2},, {"a": 3}]'):
+            self.write(text)
+            for backend in backends:
+                with self.subTest(text=text, backend=backend.name):
+                    with self.assertRaises(json.JSONDecodeError):
+                        self.read(4, backend)
+
+
+backends = [JSON_BACKENDS[name]() for name in JSON_BACKENDS if name == 'json' or orjson]
+
+
+texts = [
+    '[]',
+    '[{"a": 1, "b": "xyz"}, {"a": 12345, "b": "\\u3042\\"]"}]',
+    ' [ \n{"a": [1, 2.5, {"c": null}]} ,\n\t{"d": true, "e": "あいう"} ] \n',
+    '[1234567, -0.5e10, "abc", [], {}]',
+]
+
+
+# '},' in elements, and values decoded with the json module by orjson backend
+special_text = (
+    '[{"a": [{"b": 1}, {"b": "},"}]}, {"a": [{"b": [{}, {"c": NaN}]}]}, {"d": 18446744073709551616},'
+    ' {"d": "},{"}, {"d": 1e400}, 1, {"e": {"f": {}}}]'
+)
+
+
+if __name__ == '__main__':
+    main()
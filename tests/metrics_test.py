@@ -0,0 +1,87 @@
+import glob
+import json
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main, mock
+
+from jsonexcel import ToExcel, FromExcel, Metrics, NULL_METRICS
+
+
+class MetricsTestCase(TestCase):
+
+    def test_phases(self):
+        metrics = Metrics()
+        clock = iter(range(0, 100, 1))
+        with mock.patch('jsonexcel.metrics.time.perf_counter', lambda: next(clock)):
+            with metrics.phase('write'):
+                # 'read' takes 1 second for each item.
+                self.assertEqual([1, 2], list(metrics.iterate('read', [1, 2])))
+        # 1 second of 'write' before and after each iteration
+        self.assertEqual({'write': 4, 'read': 3}, dict(metrics.seconds))
+
+
+    def test_null_metrics(self):
+        items = [1, 2]
+        self.assertIs(items, NULL_METRICS.iterate('read', items))
+        with NULL_METRICS.phase('write'):
+            NULL_METRICS.count('cells')
+
+
+class ConverterMetricsTestCase(TestCase):
+
+    def setUp(self):
+        self.test_dir = TemporaryDirectory()
+        self.json_file = os.path.join(self.test_dir.name, 'records.json')
+        with open(self.json_file, 'w', encoding='utf-8') as f:
+            json.dump(records, f)
+
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+
+    def test_to_excel(self):
+        observer = mock.Mock()
+        metrics = Metrics(observer)
+        to_excel = ToExcel(self.json_file, schema_cache=False, metrics=metrics)
+        self.assertIs(metrics, to_excel.metrics)
+        to_excel.convert()
+        observer.assert_called_once_with(metrics)
+        result = metrics.as_dict()
+        self.assertEqual(['flatten', 'read', 'save', 'schema', 'write'], sorted(result['seconds']))
+        excel_file, = glob.glob(os.path.join(self.test_dir.name, '*.xlsx'))
+        self.assertEqual({
+            'records': 2, 'cells': 7, 'sheets': 2,
+            'input_bytes': os.path.getsize(self.json_file),
+            'output_bytes': os.path.getsize(excel_file),
+        }, result['counters'])
+
+        # Values are accumulated.
+        to_excel.partial_convert('a')
+        self.assertEqual(9, metrics.counters['cells'])
+        self.assertIs(NULL_METRICS, ToExcel(self.json_file).metrics)
+
+
+    def test_from_excel(self):
+        ToExcel(self.json_file, schema_cache=False).convert()
+        excel_file, = glob.glob(os.path.join(self.test_dir.name, '*.xlsx'))
+        for workers in (None, 2):
+            with self.subTest(workers=workers):
+                from_excel = FromExcel(excel_file, workers=workers, metrics=True)
+                from_excel.convert(replacement={'b.c': 'd'})
+                from_excel.close()
+                result = from_excel.metrics.as_dict()
+                self.assertEqual(['open', 'read', 'replace', 'write'], sorted(result['seconds']))
+                self.assertEqual({'records': 2, 'sheets': 2},
+                    {key: result['counters'][key] for key in ('records', 'sheets')})
+                self.assertGreater(result['counters']['output_bytes'], 0)
+
+
+records = [
+    {'a': 1, 'b': [{'c': 2}, {'c': 3}]},
+    {'a': 4, 'b': [{'c': 5}, {'c': 6}, {'c': 7}]},
+]
+
+
+if __name__ == '__main__':
+    main()
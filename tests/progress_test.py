@@ -0,0 +1,112 @@
+import glob
+import json
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from jsonexcel import ToExcel, FromExcel, Progress, Cancelled
+
+
+class ProgressTestCase(TestCase):
+
+    def setUp(self):
+        self.test_dir = TemporaryDirectory()
+
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+
+    def write_json(self, name):
+        path = os.path.join(self.test_dir.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            if name.endswith('.jsonl'):
+                f.write(''.join(json.dumps(record) + '\n' for record in records))
+            else:
+                json.dump(records, f)
+        return path
+
+
+    def outputs(self, pattern):
+        return glob.glob(os.path.join(self.test_dir.name, pattern))
+
+
+    def test_to_excel(self):
+        for name in ('records.json', 'records.jsonl'):
+            with self.subTest(name):
+                json_file = self.write_json(name)
+                reports = []
+                progress = Progress(lambda p: reports.append((p.phase, p.records, p.done, p.total)), 2)
+                ToExcel(json_file, schema_cache=False, progress=progress).convert()
+                size = os.path.getsize(json_file)
+                self.assertEqual([
+                    ('schema', 0, 0, size), ('schema', 2, reports[1][2], size), ('schema', 3, size, size),
+                    ('convert', 0, 0, size), ('convert', 2, reports[4][2], size), ('convert', 3, size, size),
+                ], reports)
+                self.assertEqual(1.0, progress.fraction)
+
+
+    def test_cancel_to_excel(self):
+        json_file = self.write_json('records.json')
+        to_excel = ToExcel(json_file, schema_cache=False)
+        for phase in ('schema', 'convert'):
+            with self.subTest(phase):
+                def cancel(progress):
+                    if progress.phase == phase and progress.records:
+                        progress.cancel()
+                to_excel.progress = Progress(cancel, 1)
+                with self.assertRaises(Cancelled):
+                    to_excel.convert()
+                self.assertEqual({}, to_excel.sheet_format)
+                self.assertEqual([], self.outputs('*.xlsx'))
+
+        to_excel.progress = Progress()
+        to_excel.set_sheet_format()
+        to_excel.progress.cancel()
+        with self.assertRaises(Cancelled):
+            to_excel.partial_convert('a')
+        self.assertEqual({}, to_excel.sheet_format)
+        self.assertEqual([], self.outputs('*.xlsx'))
+
+
+    def test_from_excel(self):
+        ToExcel(self.write_json('records.json'), schema_cache=False).convert()
+        excel_file, = self.outputs('*.xlsx')
+        reports = []
+        progress = Progress(lambda p: reports.append((p.phase, p.records, p.done, p.total)), 2)
+        from_excel = FromExcel(excel_file, progress=progress)
+        from_excel.convert()
+        # Data types are found in each sheet, main and b, before 'convert' pass.
+        self.assertEqual([
+            ('types', 0, 0, 3), ('types', 2, 2, 3), ('types', 3, 3, 3),
+            ('types', 0, 0, 4), ('types', 2, 2, 4), ('types', 4, 4, 4), ('types', 4, 4, 4),
+            ('convert', 0, 0, 3), ('convert', 2, 2, 3), ('convert', 3, 3, 3),
+        ], reports)
+
+        json_file, = self.outputs('records_*_*.json')
+        os.remove(json_file)
+        progress.interval = 1
+        for phase in ('types', 'convert'):
+            with self.subTest(phase):
+                progress.callback = lambda p: p.phase == phase and p.records and p.cancel()
+                progress.cancelled = False
+                with self.assertRaises(Cancelled):
+                    from_excel.convert()
+                self.assertEqual([], self.outputs('records_*_*.json'))
+        progress.callback = None
+        progress.cancelled = False
+        from_excel.convert()
+        json_file, = self.outputs('records_*_*.json')
+        with open(json_file, 'r', encoding='utf-8') as f:
+            self.assertEqual(records, json.load(f))
+
+
+records = [
+    {'a': 1, 'b': [{'c': 'x' * 100}]},
+    {'a': 2, 'b': [{'c': 'y' * 100}, {'c': 'z'}]},
+    {'a': 3, 'b': []},
+]
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+import json
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from jsonexcel import ToExcel, SchemaCache
+
+
+class SchemaCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.test_dir = TemporaryDirectory()
+        self.cache = SchemaCache(os.path.join(self.test_dir.name, 'cache'))
+        self.json_file = os.path.join(self.test_dir.name, 'test.json')
+        self.write([{'a': 1, 'b': [{'c': 2}]}])
+
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+
+    def write(self, records):
+        with open(self.json_file, 'w', encoding='utf-8') as f:
+            json.dump(records, f)
+
+
+    def test_reuse(self):
+        expected = {'a': 'main', 'b.c': 'b'}
+        to_excel = ToExcel(self.json_file, schema_cache=self.cache)
+        to_excel.set_sheet_format()
+        self.assertEqual(expected, to_excel.sheet_format)
+        to_excel = ToExcel(self.json_file, schema_cache=self.cache)
+        with patch.object(ToExcel, 'read_json') as read_json:
+            to_excel.set_sheet_format()
+        read_json.assert_not_called()
+        self.assertEqual(expected, to_excel.sheet_format)
+
+
+    def test_variant(self):
+        self.cache.set(self.json_file, {'a': 'main'}, 'x')
+        self.assertEqual({'a': 'main'}, self.cache.get(self.json_file, 'x'))
+        self.assertIsNone(self.cache.get(self.json_file, 'y'))
+
+
+    def test_invalidate(self):
+        self.cache.set(self.json_file, {'a': 'main'})
+        # The same size, different content
+        self.write([{'a': 3, 'b': [{'c': 2}]}])
+        os.utime(self.json_file, ns=(1, 1))
+        self.assertIsNone(self.cache.get(self.json_file))
+        self.assertFalse(self.cache.entries())
+
+
+    def test_touched(self):
+        self.cache.set(self.json_file, {'a': 'main'})
+        os.utime(self.json_file, ns=(1, 1))
+        self.assertIsNone(self.cache.get(self.json_file))
+
+
+    def test_not_read(self):
+        os.utime(self.json_file, ns=(1, 1))
+        with patch.object(SchemaCache, 'file_hash') as file_hash:
+            self.cache.set(self.json_file, {'a': 'main'})
+            self.assertEqual({'a': 'main'}, self.cache.get(self.json_file))
+        file_hash.assert_not_called()
+
+
+    def test_racy(self):
+        # Modified right before the entry is stored
+        self.cache.set(self.json_file, {'a': 'main'})
+        mtime = os.stat(self.json_file).st_mtime_ns
+        self.write([{'a': 3, 'b': [{'c': 2}]}])
+        os.utime(self.json_file, ns=(mtime, mtime))
+        self.assertIsNone(self.cache.get(self.json_file))
+        self.cache.set(self.json_file, {'a': 'main'})
+        with patch.object(SchemaCache, 'RACY_SECONDS', 0):
+            self.assertEqual({'a': 'main'}, self.cache.get(self.json_file))
+        with patch.object(SchemaCache, 'file_hash') as file_hash:
+            self.assertEqual({'a': 'main'}, self.cache.get(self.json_file))
+        file_hash.assert_not_called()
+
+
+    def test_evict(self):
+        self.cache.set(self.json_file, {'a': 'main'}, 'old')
+        _, size, _ = self.cache.entries()[0]
+        os.utime(self.cache.entry_path(self.json_file, 'old'), ns=(1, 1))
+        self.cache.max_size = size * 2
+        self.cache.set(self.json_file, {'a': 'main'}, 'new')
+        self.cache.set(self.json_file, {'a': 'main'}, 'newer')
+        self.assertIsNone(self.cache.get(self.json_file, 'old'))
+        self.assertIsNotNone(self.cache.get(self.json_file, 'newer'))
+
+
+if __name__ == '__main__':
+    main()
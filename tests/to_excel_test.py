@@ -0,0 +1,208 @@
+import glob
+import json
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+from unittest.mock import patch
+
+import openpyxl
+from xlsxwriter.workbook import Workbook
+
+from jsonexcel import ToExcel, FromExcel, FastToExcel, SchemaError, WritingSheet
+
+
+def read_workbook(excel_file):
+    wb = openpyxl.load_workbook(excel_file)
+    return {sh.title: [[cell.value for cell in row] for row in sh.iter_rows()] for sh in wb}
+
+
+class ToExcelOptionTestCase(TestCase):
+
+    def setUp(self):
+        self.test_dir = TemporaryDirectory()
+
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+
+    def convert(self, name, *keys, ext='.json', to_excel_class=ToExcel, data=None, **options):
+        dir_path = os.path.join(self.test_dir.name, name)
+        os.mkdir(dir_path)
+        json_file = os.path.join(dir_path, 'records' + ext)
+        data = records if data is None else data
+        with open(json_file, 'w', encoding='utf-8') as f:
+            if ext == '.json':
+                json.dump(data, f, ensure_ascii=False)
+            else:
+                f.writelines(json.dumps(record, ensure_ascii=False) + '\n' for record in data)
+        to_excel = to_excel_class(json_file, **options)
+        if keys:
+            to_excel.partial_convert(*keys)
+        else:
+            to_excel.convert()
+        excel_file, = glob.glob(os.path.join(dir_path, '*.xlsx'))
+        return read_workbook(excel_file)
+
+
+    def round_trip(self, name, **options):
+        self.convert(name, data=sheet_records, **options)
+        excel_file, = glob.glob(os.path.join(self.test_dir.name, name, '*.xlsx'))
+        FromExcel(excel_file).convert()
+        json_file, = glob.glob(os.path.join(self.test_dir.name, name, 'records_*.json'))
+        with open(json_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+
+    def test_single_pass(self):
+        expected = self.convert('default')
+        self.assertEqual(expected, self.convert('single_pass', single_pass=True))
+
+
+    def test_single_pass_partial(self):
+        keys = ('a', 'c.g.i', 'e.f_f')
+        expected = self.convert('default', *keys)
+        self.assertEqual(expected, self.convert('single_pass', *keys, single_pass=True))
+
+
+    @patch.object(ToExcel, 'RECORDS_PER_TASK', 2)
+    def test_workers(self):
+        expected = self.convert('default')
+        self.assertEqual(expected, self.convert('workers', workers=2))
+        keys = ('a', 'c.g.i', 'e.f_f')
+        expected = self.convert('default_partial', *keys)
+        self.assertEqual(expected, self.convert('workers_partial', *keys, workers=2))
+        self.assertEqual(self.round_trip('sample', sample=1),
+            self.round_trip('workers_sample', sample=1, workers=2))
+
+
+    @patch.object(ToExcel, 'BYTES_PER_TASK', 64)
+    def test_json_lines(self):
+        expected = self.convert('default')
+        self.assertEqual(expected, self.convert('jsonl', ext='.jsonl'))
+        self.assertEqual(expected, self.convert('ndjson', ext='.ndjson', single_pass=True))
+        self.assertEqual(expected, self.convert('workers', ext='.jsonl', workers=2))
+        keys = ('a', 'c.g.i', 'e.f_f')
+        expected = self.convert('default_partial', *keys)
+        self.assertEqual(expected, self.convert('workers_partial', *keys, ext='.jsonl', workers=2))
+
+
+    @patch('jsonexcel.convert.SpooledWorksheet.BATCH_SIZE', 2)
+    def test_low_memory(self):
+        expected = self.convert('default')
+        self.assertEqual(expected, self.convert('low_memory', low_memory=True))
+        expected = self.convert('sample', sample=1)
+        self.assertEqual(expected, self.convert('low_memory_sample', sample=1, low_memory=True))
+        excel_file, = glob.glob(os.path.join(self.test_dir.name, 'low_memory', '*.xlsx'))
+        self.assertEqual('https://example.com', 
+            openpyxl.load_workbook(excel_file)['main']['C2'].hyperlink.target)
+
+
+    def test_engine(self):
+        expected = self.convert('default')
+        self.assertEqual(expected, self.convert('pyexcelerate', engine='pyexcelerate'))
+        self.assertEqual(expected, self.convert('fast', to_excel_class=FastToExcel))
+        expected = self.convert('sample', sample=1)
+        self.assertEqual(expected, self.convert('pyexcelerate_sample', sample=1, engine='pyexcelerate'))
+        self.assertEqual(self.round_trip('round_trip'), 
+            self.round_trip('pyexcelerate_round_trip', engine='pyexcelerate'))
+        with self.assertRaises(ValueError):
+            self.convert('unknown', engine='unknown')
+        with self.assertRaises(ValueError):
+            self.convert('low_memory', engine='pyexcelerate', low_memory=True)
+
+
+    def test_formula_string(self):
+        values = ['=1+1', '=HYPERLINK("https://example.com")', '=A1<B1']
+        for engine in ('xlsxwriter', 'pyexcelerate'):
+            with self.subTest(engine):
+                dir_path = os.path.join(self.test_dir.name, f'formula_{engine}')
+                os.mkdir(dir_path)
+                json_file = os.path.join(dir_path, 'records.json')
+                with open(json_file, 'w', encoding='utf-8') as f:
+                    json.dump([{'a': value} for value in values], f)
+                ToExcel(json_file, schema_cache=False, engine=engine).convert()
+                excel_file, = glob.glob(os.path.join(dir_path, '*.xlsx'))
+                # Strings starting with '=' are not written as formulas.
+                sh = openpyxl.load_workbook(excel_file)['main']
+                self.assertEqual(['s'] * 3, [sh.cell(row=i, column=2).data_type for i in (2, 3, 4)])
+                with FromExcel(excel_file) as from_excel:
+                    from_excel.convert()
+                output, = glob.glob(os.path.join(dir_path, 'records_*.json'))
+                with open(output, 'r', encoding='utf-8') as f:
+                    self.assertEqual(values, [record['a'] for record in json.load(f)])
+
+
+    def test_schema(self):
+        expected = self.convert('default', data=sheet_records)
+        schema = {'a': 'main', 'b': 'main', 'c.f': 'c', 'c.g.h': 'c.g', 'c.g.i': 'c.g',
+            'c.g-0': 'c', 'd-0': 'main', 'd-1': 'main', 'd-2': 'main', 'e.f_f': 'e', 'e.z-0': 'e', 'e-0': 'main'}
+        self.assertEqual(expected, self.convert('schema', data=sheet_records, schema=schema))
+
+
+    def test_sample(self):
+        expected = self.round_trip('default')
+        result = self.round_trip('sample', sample=1)
+        self.assertEqual(expected, result)
+        wb = read_workbook(glob.glob(os.path.join(self.test_dir.name, 'sample', '*.xlsx'))[0])
+        # Late columns are appended to the right end.
+        self.assertEqual([None, 'a', 'b', 'd-0', 'd-1', 'd-2'], wb['main'][0])
+
+
+    def test_sample_ignore(self):
+        wb = self.convert('ignore', data=sheet_records, sample=1, late_columns='ignore')
+        self.assertEqual(['main', 'c', 'c.g'], list(wb))
+        self.assertEqual([None, 'a', 'b'], wb['main'][0])
+
+
+    def test_sample_error(self):
+        with self.assertRaises(SchemaError):
+            self.convert('error', data=sheet_records, sample=1, late_columns='error')
+
+
+class WritingSheetTestCase(TestCase):
+
+    def setUp(self):
+        self.test_dir = TemporaryDirectory()
+
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+
+    def test_write(self):
+        excel_file = os.path.join(self.test_dir.name, 'test.xlsx')
+        values = [1, 'x', 'https://example.com', 'ftp', 2.5, None, True, [], 3, 'http://example.com/a']
+        with Workbook(excel_file) as wb:
+            sheet = WritingSheet(wb.add_worksheet('main'), ['a', 'b'], plain_text=('b',))
+            for row, value in enumerate(values, 1):
+                sheet.write(row, 1, value, str(row))
+                sheet.write(row, 2, value)
+        ws = openpyxl.load_workbook(excel_file)['main']
+        expected = [None if value == [] else value for value in values]
+        for col in (2, 3):
+            with self.subTest(col=col):
+                self.assertEqual(expected, [ws.cell(row=row, column=col).value \
+                    for row in range(2, len(values) + 2)])
+        urls = [row for row in range(2, len(values) + 2) if ws.cell(row=row, column=2).hyperlink]
+        self.assertEqual([4, 11], urls)
+        self.assertFalse(any(ws.cell(row=row, column=3).hyperlink for row in urls))
+
+
+records = [
+    {'a': 1, 'b': 'https://example.com', 'c': {'f': 5, 'g': [{'h': 100, 'i': 120}, {'h': 200, 'i': 220}]}},
+    {'a': 2, 'd': [1.5, True, None], 'e': [{'f-f': 'x'}, {'f-f': 'y', 'z': []}]},
+    {'a': 3, 'c': {'f': 7, 'g': []}, 'e': []},
+]
+
+
+# c is a list of dicts, which is written to its own sheet and read back by FromExcel.
+sheet_records = [
+    {'a': 1, 'b': 'https://example.com', 'c': [{'f': 5, 'g': [{'h': 100, 'i': 120}, {'h': 200, 'i': 220}]}]},
+    {'a': 2, 'd': [1.5, True, None], 'e': [{'f-f': 'x'}, {'f-f': 'y', 'z': []}]},
+    {'a': 3, 'c': [{'f': 7, 'g': []}], 'e': []},
+]
+
+
+if __name__ == '__main__':
+    main()